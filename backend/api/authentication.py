@@ -0,0 +1,155 @@
+import copy
+import hashlib
+import time
+import uuid
+from collections import OrderedDict
+from threading import Lock
+
+from django.core.cache import caches
+from foodgram.settings import (AUTH_TOKEN_CACHE_SIZE, AUTH_TOKEN_CACHE_TTL,
+                               AUTH_TOKEN_REVOCATION_CACHE,
+                               AUTH_TOKEN_SHARED_CACHE)
+from foodgram.routers import primary_reads
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+AUTH_TOKEN_KEY = 'auth_token:{}'
+AUTH_TOKEN_REVOKED_KEY = 'auth_token_revoked:{}'
+
+
+def token_digest(key):
+    """
+    Возвращает хэш токена, под которым он хранится в кэше.
+    """
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class TokenLRUCache:
+    """
+    Ограниченный по размеру кэш записей (пользователь, токен, отметка
+    об отзыве) с TTL.
+
+    Хранится в памяти процесса. При переполнении вытесняются
+    записи, к которым дольше всего не обращались.
+    """
+
+    def __init__(self, size, ttl):
+        self.size = size
+        self.ttl = ttl
+        self._lock = Lock()
+        self._entries = OrderedDict()
+
+    def get(self, digest):
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[digest]
+                return None
+            self._entries.move_to_end(digest)
+            return value
+
+    def set(self, digest, value):
+        with self._lock:
+            self._entries[digest] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def delete(self, digest):
+        with self._lock:
+            self._entries.pop(digest, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+local_tokens = TokenLRUCache(AUTH_TOKEN_CACHE_SIZE, AUTH_TOKEN_CACHE_TTL)
+
+
+def shared_tokens():
+    """
+    Возвращает общий для процессов кэш токенов или None, если он
+    не настроен.
+    """
+    if not AUTH_TOKEN_SHARED_CACHE:
+        return None
+    return caches[AUTH_TOKEN_SHARED_CACHE]
+
+
+def revocation_marker(digest):
+    """
+    Возвращает отметку об отзыве токена или None, если токен
+    не отзывался.
+    """
+    return caches[AUTH_TOKEN_REVOCATION_CACHE].get(
+        AUTH_TOKEN_REVOKED_KEY.format(digest)
+    )
+
+
+def invalidate_token(key):
+    """
+    Удаляет токен из кэшей и отмечает его отзыв в общем кэше.
+
+    Процессы сравнивают отметку с запомненной при кэшировании токена,
+    поэтому отозванный токен перестает приниматься сразу во всех
+    процессах. Отметка хранится дольше, чем токен живет в локальном кэше.
+    """
+    digest = token_digest(key)
+    caches[AUTH_TOKEN_REVOCATION_CACHE].set(
+        AUTH_TOKEN_REVOKED_KEY.format(digest),
+        uuid.uuid4().hex,
+        timeout=AUTH_TOKEN_CACHE_TTL * 2
+    )
+    local_tokens.delete(digest)
+    shared = shared_tokens()
+    if shared is not None:
+        shared.delete(AUTH_TOKEN_KEY.format(digest))
+
+
+def invalidate_user_tokens(user):
+    """
+    Удаляет из кэшей токены пользователя и отмечает их отзыв.
+    """
+    for key in Token.objects.filter(user=user).values_list('key', flat=True):
+        invalidate_token(key)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Аутентификация по токену с кэшированием результата проверки.
+
+    Сначала токен ищется в памяти процесса, затем в общем кэше и только
+    потом в основной базе данных: только что выданный токен может еще
+    не дойти до реплик. Найденный в кэше токен принимается, только если
+    с момента кэширования он не был отозван (см. invalidate_token).
+    Отметка об отзыве читается до обращения к базе, поэтому отзыв,
+    совпавший по времени с проверкой, тоже будет замечен.
+
+    Каждый запрос получает собственные копии пользователя и токена,
+    поэтому изменения request.user не попадают в кэш.
+    """
+
+    def authenticate_credentials(self, key):
+        digest = token_digest(key)
+        marker = revocation_marker(digest)
+        value = local_tokens.get(digest)
+        if value is None or value[2] != marker:
+            shared = shared_tokens()
+            if shared is not None:
+                value = shared.get(AUTH_TOKEN_KEY.format(digest))
+            if value is None or value[2] != marker:
+                with primary_reads():
+                    value = (*super().authenticate_credentials(key), marker)
+                if shared is not None:
+                    shared.set(
+                        AUTH_TOKEN_KEY.format(digest),
+                        value,
+                        timeout=AUTH_TOKEN_CACHE_TTL
+                    )
+            local_tokens.set(digest, value)
+        user, token, _ = value
+        return copy.copy(user), copy.copy(token)
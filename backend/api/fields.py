@@ -0,0 +1,26 @@
+from django.core.files.storage import default_storage
+from recipes.images import derivative_name
+from rest_framework import serializers
+
+
+class ImageDerivativeField(serializers.ReadOnlyField):
+    """
+    Поле со ссылкой на производное изображение рецепта.
+
+    Attributes:
+        derivative (str): Имя производного изображения
+        из recipes.images.IMAGE_DERIVATIVES.
+    """
+    def __init__(self, derivative, **kwargs):
+        self.derivative = derivative
+        kwargs.setdefault('source', 'image')
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        url = default_storage.url(derivative_name(value.name, self.derivative))
+        request = self.context.get('request')
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
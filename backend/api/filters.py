@@ -1,3 +1,4 @@
+from django.db.models import F
 from django_filters.rest_framework import FilterSet, filters
 
 from recipes.models import Ingredients, Recipes, TimeTag
@@ -30,6 +31,11 @@ class RecipesFilter(FilterSet):
     is_in_shopping_cart = filters.BooleanFilter(
         method='get_is_in_shopping_cart'
     )
+    search = filters.CharFilter(method='get_search')
+    ordering = filters.ChoiceFilter(
+        choices=(('popular', 'Популярные'),),
+        method='get_ordering'
+    )
 
     class Meta:
         model = Recipes
@@ -43,7 +49,7 @@ class RecipesFilter(FilterSet):
         Фильтрует рецепты по наличию в избранном у пользователя.
         """
         if value and not self.request.user.is_anonymous:
-            return queryset.filter(favorites__user=self.request.user)
+            return queryset.filter(is_favorited=True)
         return queryset
 
     def get_is_in_shopping_cart(self, queryset, name, value):
@@ -51,5 +57,23 @@ class RecipesFilter(FilterSet):
         Фильтрует рецепты по наличию в корзине покупок у пользователя.
         """
         if value and not self.request.user.is_anonymous:
-            return queryset.filter(shoplist__user=self.request.user)
+            return queryset.filter(is_in_shopping_cart=True)
+        return queryset
+
+    def get_search(self, queryset, name, value):
+        """
+        Ищет рецепты по тексту и упорядочивает их по релевантности.
+        """
+        if not value:
+            return queryset
+        return queryset.search(value).order_by('-search_rank', '-id')
+
+    def get_ordering(self, queryset, name, value):
+        """
+        Упорядочивает рецепты по рейтингу популярности.
+        """
+        if value == 'popular':
+            return queryset.order_by(
+                F('ranking__score').desc(nulls_last=True), '-id'
+            )
         return queryset
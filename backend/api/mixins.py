@@ -0,0 +1,52 @@
+from hashlib import sha1
+
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+from foodgram.settings import CATALOG_CACHE_MAX_AGE
+from recipes.catalog import get_catalog_version
+
+
+class ConditionalCatalogMixin:
+    """
+    Поддержка условных GET-запросов для справочников.
+
+    ETag вычисляется по версии справочника и адресу запроса. Версия
+    общая для всех процессов, поэтому все воркеры выдают одинаковые ETag,
+    а изменение справочника командой управления меняет их не позже чем
+    через CATALOG_VERSION_TTL секунд. Если ETag совпадает с
+    If-None-Match, ответ 304 возвращается без выборки справочника
+    и сериализаторов.
+
+    Attributes:
+        catalog (str): Имя справочника в recipes.catalog.
+    """
+    catalog = None
+
+    def get_catalog_etag(self, request):
+        """
+        Возвращает ETag ответа для текущей версии справочника.
+        """
+        version = get_catalog_version(self.catalog)
+        key = (f'{self.catalog}:{version}:{request.get_full_path()}:'
+               f'{request.META.get("HTTP_ACCEPT", "")}')
+        return quote_etag(sha1(key.encode()).hexdigest())
+
+    def patch_catalog_headers(self, response, etag):
+        response['ETag'] = etag
+        patch_cache_control(
+            response, public=True, max_age=CATALOG_CACHE_MAX_AGE
+        )
+        patch_vary_headers(response, ('Accept',))
+        return response
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        etag = self.get_catalog_etag(request)
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            return self.patch_catalog_headers(HttpResponseNotModified(), etag)
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200:
+            self.patch_catalog_headers(response, etag)
+        return response
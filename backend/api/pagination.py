@@ -1,4 +1,6 @@
-from rest_framework.pagination import PageNumberPagination
+from foodgram.settings import CURSOR_PAGE_SIZE
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 
 class FoodgramPageNumberPagination(PageNumberPagination):
@@ -11,3 +13,61 @@ class FoodgramPageNumberPagination(PageNumberPagination):
         количества элементов на странице.
     """
     page_size_query_param = 'limit'
+
+
+class FoodgramCursorPagination(CursorPagination):
+    """
+    Пагинация по курсору (keyset) для API Foodgram.
+
+    Страница выбирается условием по ключу сортировки, без OFFSET
+    и без подсчета общего количества, поэтому любая страница стоит
+    столько же, сколько первая.
+
+    Параметры, задающие другой порядок выдачи (ordering=popular,
+    сортировка search по релевантности), с курсором по ключу сортировки
+    несовместимы, поэтому такие запросы отклоняются с ошибкой 400.
+
+    Attributes:
+        ordering (str): Ключ сортировки, совпадающий с Recipes.Meta.ordering.
+        page_size_query_param (str): Параметр запроса для указания
+        количества элементов на странице.
+        ordering_params (tuple): Параметры запроса, меняющие порядок выдачи.
+    """
+    ordering = '-id'
+    page_size = CURSOR_PAGE_SIZE
+    page_size_query_param = 'limit'
+    ordering_params = ('ordering', 'search')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        errors = {
+            param: 'Параметр не поддерживается при пагинации по курсору, '
+                   'используйте пагинацию по номерам страниц'
+            for param in self.ordering_params
+            if request.query_params.get(param)
+        }
+        if errors:
+            raise ValidationError(errors)
+        return super().paginate_queryset(queryset, request, view)
+
+
+class SubscriptionsCursorPagination(FoodgramCursorPagination):
+    """
+    Пагинация по курсору для списка пользователей и подписок.
+    """
+    ordering = 'id'
+
+
+class OptionalCursorPaginationMixin:
+    """
+    Включает пагинацию по курсору, если в запросе передан параметр
+    pagination=cursor. Без параметра используется pagination_class.
+    """
+    cursor_pagination_class = FoodgramCursorPagination
+
+    @property
+    def paginator(self):
+        if (not hasattr(self, '_paginator')
+                and self.request is not None
+                and self.request.query_params.get('pagination') == 'cursor'):
+            self._paginator = self.cursor_pagination_class()
+        return super().paginator
@@ -0,0 +1,92 @@
+import csv
+import json
+
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.renderers import BaseRenderer
+
+
+class Echo:
+    """
+    Псевдобуфер для csv.writer, возвращающий записанную строку.
+    """
+    def write(self, value):
+        return value
+
+
+class FormatParameterNegotiation(DefaultContentNegotiation):
+    """
+    Выбирает рендерер только по параметру format, не учитывая заголовок
+    Accept, чтобы клиенты без параметра получали формат по умолчанию.
+    """
+    def select_renderer(self, request, renderers, format_suffix=None):
+        format_query_param = self.settings.URL_FORMAT_OVERRIDE
+        format = format_suffix or request.query_params.get(format_query_param)
+        if format:
+            renderers = self.filter_renderers(renderers, format)
+        return renderers[0], renderers[0].media_type
+
+
+class ShoplistRenderer(BaseRenderer):
+    """
+    Базовый класс рендеринга списка покупок.
+
+    Список отдается потоком через stream(), render() используется
+    только для ответов с ошибками.
+    """
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, ensure_ascii=False).encode(self.charset)
+
+    @property
+    def content_type(self):
+        return f'{self.media_type}; charset={self.charset}'
+
+    def stream(self, items):
+        """
+        Возвращает итератор частей файла для строк items.
+        """
+        raise NotImplementedError
+
+
+class ShoplistTextRenderer(ShoplistRenderer):
+    """
+    Список покупок в виде текстового файла.
+    """
+    media_type = 'text/plain'
+    format = 'txt'
+
+    def stream(self, items):
+        for num, item in enumerate(items, start=1):
+            yield (f'{num}. {item["name"]} - '
+                   f'{item["amount"]} {item["measurement_unit"]} \n')
+
+
+class ShoplistCSVRenderer(ShoplistRenderer):
+    """
+    Список покупок в формате CSV.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def stream(self, items):
+        writer = csv.writer(Echo())
+        yield writer.writerow(['name', 'amount', 'measurement_unit'])
+        for item in items:
+            yield writer.writerow(
+                [item['name'], item['amount'], item['measurement_unit']]
+            )
+
+
+class ShoplistJSONRenderer(ShoplistRenderer):
+    """
+    Список покупок в формате JSON.
+    """
+    media_type = 'application/json'
+    format = 'json'
+
+    def stream(self, items):
+        yield '['
+        for num, item in enumerate(items):
+            yield (',' if num else '') + json.dumps(item, ensure_ascii=False)
+        yield ']'
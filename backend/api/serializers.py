@@ -6,11 +6,17 @@ from drf_extra_fields.fields import Base64ImageField
 from foodgram.settings import PASSWORD
 from recipes.models import (Favorites, Ingredients, RecipeIngredients, Recipes,
                             Shoplist, TimeTag)
+from recipes.images import is_same_image
+from recipes.minhash import schedule_signature_update
+from recipes.pantry_index import pantry_index
+from recipes.shoplist import update_recipe_in_shoplists
 from rest_framework import serializers
 from rest_framework.validators import (UniqueTogetherValidator,
                                        UniqueValidator, ValidationError)
 from users.models import Subscribe, User
 
+from api.fields import ImageDerivativeField
+
 
 class UsersSerializer(UserSerializer):
     """
@@ -69,11 +75,49 @@ class UsersSerializer(UserSerializer):
         return instance
 
 
+def get_recipes_limit(request):
+    """
+    Возвращает значение параметра recipes_limit из запроса.
+
+    Некорректное значение приводит к ошибке валидации, а не к ошибке
+    сервера.
+    """
+    limit = request.query_params.get('recipes_limit')
+    if limit is None:
+        return None
+    try:
+        limit = int(limit)
+    except ValueError:
+        limit = -1
+    if limit < 0:
+        raise ValidationError({
+            'recipes_limit': 'Введите целое неотрицательное число'
+        })
+    return limit
+
+
+class PantrySearchSerializer(serializers.Serializer):
+    """
+    Сериализатор параметров поиска рецептов по имеющимся ингредиентам.
+    """
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False
+    )
+    coverage = serializers.IntegerField(
+        min_value=1,
+        max_value=100,
+        default=100
+    )
+
+
 class SubscribeRecipesSerializer(serializers.ModelSerializer):
     """
     Сериализатор модели Recipes для взаимодействия с подписками.
     """
     image = Base64ImageField()
+    thumbnail = ImageDerivativeField('thumbnail')
+    thumbnail_webp = ImageDerivativeField('thumbnail_webp')
 
     class Meta:
         model = Recipes
@@ -81,6 +125,8 @@ class SubscribeRecipesSerializer(serializers.ModelSerializer):
             'id',
             'name',
             'image',
+            'thumbnail',
+            'thumbnail_webp',
             'cooking_time',
         ]
 
@@ -109,28 +155,35 @@ class SubscribeDetailSerializer(UsersSerializer):
         Определяет, подписан ли текущий аутентифицированный
         пользователь на объект.
         """
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         user = self.context['request'].user
         if user.is_authenticated:
             return Subscribe.objects.filter(
-                author=user,
-                user=obj
+                author=obj,
+                user=user
             ).exists()
         return False
 
     def get_recipes(self, obj):
-        limit = self.context['request'].query_params.get('recipes_limit')
-        recipes = (
-            obj.recipes.all()[:int(limit)]
-            if limit is not None else obj.recipes.all()
-        )
+        """
+        Возвращает рецепты автора с учетом параметра recipes_limit.
+        """
+        if hasattr(obj, 'limited_recipes'):
+            recipes = obj.limited_recipes
+        else:
+            limit = get_recipes_limit(self.context['request'])
+            recipes = (
+                obj.recipes.all()[:limit]
+                if limit is not None else obj.recipes.all()
+            )
         return SubscribeRecipesSerializer(recipes, many=True).data
 
     def get_recipes_count(self, obj):
         """
-        Возвращает общее количество рецептов,
-        на которые подписан пользователь.
+        Возвращает общее количество рецептов автора.
         """
-        return obj.recipes.count()
+        return obj.recipes_count
 
 
 class SubscribeSerializer(serializers.ModelSerializer):
@@ -244,6 +297,9 @@ class RecipesSerializer(serializers.ModelSerializer):
         read_only=True
     )
     image = Base64ImageField()
+    thumbnail = ImageDerivativeField('thumbnail')
+    thumbnail_webp = ImageDerivativeField('thumbnail_webp')
+    image_webp = ImageDerivativeField('image_webp')
 
     class Meta:
         model = Recipes
@@ -256,6 +312,9 @@ class RecipesSerializer(serializers.ModelSerializer):
             'is_in_shopping_cart',
             'name',
             'image',
+            'thumbnail',
+            'thumbnail_webp',
+            'image_webp',
             'text',
             'cooking_time',
         ]
@@ -264,6 +323,8 @@ class RecipesSerializer(serializers.ModelSerializer):
         """
         Проверяет, находится ли рецепт в избранном у пользователя.
         """
+        if hasattr(recipe, 'is_favorited'):
+            return recipe.is_favorited
         user = self.context.get('request').user
         return not user.is_anonymous and Favorites.objects.filter(
             recipe=recipe, user=user).exists()
@@ -272,6 +333,8 @@ class RecipesSerializer(serializers.ModelSerializer):
         """
         Проверяет, находится ли рецепт в списке покупок у пользователя.
         """
+        if hasattr(recipe, 'is_in_shopping_cart'):
+            return recipe.is_in_shopping_cart
         user = self.context.get('request').user
         return not user.is_anonymous and Shoplist.objects.filter(
             recipe=recipe, user=user).exists()
@@ -320,23 +383,49 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
     def validate(self, data):
         """
         Проверяет передаваемые данные о рецепте.
+
+        При частичном обновлении проверяются только переданные поля.
+        """
+        if 'ingredients' in data or not self.partial:
+            self.check_ingredients(data.get('ingredients') or [])
+        if 'tags' in data or not self.partial:
+            self.check_tags(data.get('tags'))
+        return data
+
+    def check_ingredients(self, ingredients):
         """
-        ingredients = data.get('ingredients')
-        ingredient_list = []
+        Проверяет, что ингредиенты не повторяются и существуют.
+        """
+        ingredient_list = set()
         for ingredient in ingredients:
             ingredient_id = ingredient['id']
             if ingredient_id in ingredient_list:
                 raise ValidationError({
                     'ingredients': 'Вы уже добавили этот ингредиент'
                 })
-            ingredient_list.append(ingredient_id)
+            ingredient_list.add(ingredient_id)
             amount = ingredient['amount']
-            if int(amount) < 1 and int(amount) > 5000:
+            if int(amount) < 1 or int(amount) > 5000:
                 raise ValidationError({
                     'amount': 'Введите правильное количество'
                 })
 
-        tags = data.get('tags')
+        existing = Ingredients.objects.in_bulk(ingredient_list)
+        if len(existing) < len(ingredient_list):
+            raise ValidationError({
+                'ingredients': [
+                    {} if ingredient['id'] in existing else {
+                        'id': [f'Ингредиент с id {ingredient["id"]} '
+                               f'не существует']
+                    }
+                    for ingredient in ingredients
+                ]
+            })
+
+    def check_tags(self, tags):
+        """
+        Проверяет, что временные метки выбраны и не повторяются.
+        """
         if not tags:
             raise ValidationError({
                 'tags': 'Выберите временную метку'
@@ -349,27 +438,85 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
                 })
             tags_list.append(tag)
 
-        return data
-
     @transaction.atomic
     def add_ingredients(self, ingredients, recipe):
         """
         Добавляет ингредиенты к рецепту.
+
+        bulk_create не отправляет сигналы, поэтому обратный индекс
+        ингредиентов и MinHash-подпись обновляются явно.
         """
         RecipeIngredients.objects.bulk_create(
             [RecipeIngredients(
-                ingredient=Ingredients.objects.get(id=ingredient['id']),
+                ingredient_id=ingredient['id'],
                 recipe=recipe,
                 amount=ingredient['amount']
             ) for ingredient in ingredients]
         )
+        pantry_index.track(
+            recipe.id,
+            [ingredient['id'] for ingredient in ingredients],
+            added=True
+        )
+        schedule_signature_update(recipe.id)
 
     def add_tags(self, tags, recipe):
         """
         Добавляет временные метки к рецепту.
         """
-        for tag in tags:
-            recipe.tags.add(tag)
+        recipe.tags.add(*tags)
+
+    def update_tags(self, tags, recipe):
+        """
+        Приводит временные метки рецепта к переданному списку,
+        добавляя и удаляя только изменившиеся связи.
+        """
+        current = set(recipe.tags.values_list('id', flat=True))
+        submitted = {tag.id for tag in tags}
+        if current - submitted:
+            recipe.tags.remove(*(current - submitted))
+        if submitted - current:
+            recipe.tags.add(*(submitted - current))
+
+    def update_ingredients(self, ingredients, recipe):
+        """
+        Приводит ингредиенты рецепта к переданному списку.
+
+        Новые строки добавляются, измененные количества обновляются,
+        лишние строки удаляются, каждое действие одним запросом.
+        Возвращает прежние и новые количества ингредиентов.
+        """
+        current = {
+            row.ingredient_id: row
+            for row in RecipeIngredients.objects.filter(recipe=recipe)
+        }
+        old_amounts = {
+            ingredient_id: row.amount for ingredient_id, row in current.items()
+        }
+        new_amounts = {
+            ingredient['id']: ingredient['amount']
+            for ingredient in ingredients
+        }
+        removed = current.keys() - new_amounts.keys()
+        if removed:
+            RecipeIngredients.objects.filter(
+                recipe=recipe, ingredient_id__in=removed
+            ).delete()
+        changed = []
+        for ingredient_id, row in current.items():
+            amount = new_amounts.get(ingredient_id)
+            if amount is not None and amount != row.amount:
+                row.amount = amount
+                changed.append(row)
+        if changed:
+            RecipeIngredients.objects.bulk_update(changed, ['amount'])
+        added = [
+            ingredient for ingredient in ingredients
+            if ingredient['id'] not in current
+        ]
+        if added:
+            self.add_ingredients(added, recipe)
+        return old_amounts, new_amounts
 
     @transaction.atomic
     def create(self, validated_data):
@@ -388,12 +535,33 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         """
         Обновляет существующий рецепт.
-        """
-        instance.tags.clear()
-        RecipeIngredients.objects.filter(recipe=instance).delete()
-        self.add_tags(validated_data.pop('tags'), instance)
-        self.add_ingredients(validated_data.pop('ingredients'), instance)
-        return super().update(instance, validated_data)
+
+        Записываются только изменившиеся поля, временные метки
+        и ингредиенты. Повторно загруженное то же изображение
+        не сохраняется.
+        """
+        image = validated_data.get('image')
+        if image is not None and is_same_image(instance.image, image):
+            del validated_data['image']
+        tags = validated_data.pop('tags', None)
+        if tags is not None:
+            self.update_tags(tags, instance)
+        ingredients = validated_data.pop('ingredients', None)
+        if ingredients is not None:
+            old_amounts, new_amounts = self.update_ingredients(
+                ingredients, instance
+            )
+            update_recipe_in_shoplists(instance.id, old_amounts, new_amounts)
+
+        changed_fields = [
+            field for field, value in validated_data.items()
+            if getattr(instance, field) != value
+        ]
+        for field in changed_fields:
+            setattr(instance, field, validated_data[field])
+        if changed_fields:
+            instance.save(update_fields=changed_fields)
+        return instance
 
     def to_representation(self, instance):
         """
@@ -401,5 +569,8 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
         """
         request = self.context.get('request')
         context = {'request': request}
+        instance = Recipes.objects.with_related().with_user_flags(
+            request.user
+        ).get(pk=instance.pk)
         return RecipesSerializer(
             instance, context=context).data
@@ -0,0 +1,47 @@
+from functools import partial
+
+from django.core.management import call_command
+from django.db import transaction
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from users.models import User
+
+from api.authentication import invalidate_token, invalidate_user_tokens
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    """
+    Удаляет токен из кэша аутентификации.
+
+    Ключ запоминается сразу: после удаления Django обнуляет первичный
+    ключ экземпляра, а им у токена служит сам ключ.
+    """
+    transaction.on_commit(partial(invalidate_token, instance.key))
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Удаляет из кэша аутентификации токены пользователя при изменении
+    его данных, в том числе пароля и признака активности.
+
+    У нового пользователя токенов еще нет, а обновление только времени
+    входа кэш не сбрасывает.
+    """
+    if created:
+        return
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    transaction.on_commit(lambda: invalidate_user_tokens(instance))
+
+
+@receiver(post_migrate)
+def migrated(sender, using, **kwargs):
+    """
+    Создает таблицы кэшей в базе данных, в том числе общего кэша
+    с отметками об отзыве токенов. Существующие таблицы не меняются.
+    """
+    if sender.label == 'authtoken':
+        call_command('createcachetable', database=using, verbosity=0)
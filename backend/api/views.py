@@ -1,13 +1,19 @@
 from django.contrib.auth.hashers import make_password
-from django.db import IntegrityError
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.db import IntegrityError, connection, transaction
+from django.db.models import (BooleanField, F, Prefetch, Value,
+                              prefetch_related_objects)
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
 from foodgram.settings import ALLOWED_ACTIONS
-from recipes.models import (Favorites, Ingredients, RecipeIngredients, Recipes,
-                            Shoplist, TimeTag)
+from recipes.catalog import INGREDIENTS_CATALOG, TAGS_CATALOG
+from recipes.feed import feed_queryset
+from recipes.ingredient_index import ingredient_index
+from recipes.minhash import similar_recipes
+from recipes.models import (Favorites, Ingredients, Recipes, Shoplist,
+                            ShoplistIngredients, TimeTag)
+from recipes.pantry_index import pantry_index
 from rest_framework.decorators import action
 from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
 from rest_framework.response import Response
@@ -18,21 +24,52 @@ from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 from users.models import Subscribe, User
 
 from api.filters import IngredientsFilter, RecipesFilter
-from api.pagination import FoodgramPageNumberPagination
+from api.mixins import ConditionalCatalogMixin
+from api.pagination import (FoodgramCursorPagination,
+                            FoodgramPageNumberPagination,
+                            OptionalCursorPaginationMixin,
+                            SubscriptionsCursorPagination)
 from api.permissions import AuthorOrReadOnly
+from api.renderers import (FormatParameterNegotiation, ShoplistCSVRenderer,
+                           ShoplistJSONRenderer, ShoplistTextRenderer)
 from api.serializers import (CreateRecipeSerializer, IngredientsSerializer,
-                             RecipesSerializer, SubscribeDetailSerializer,
+                             PantrySearchSerializer, RecipesSerializer,
+                             SubscribeDetailSerializer,
                              SubscribeRecipesSerializer, TimeTagSerializer,
-                             UsersSerializer)
+                             UsersSerializer, get_recipes_limit)
 
 
-class ActionUserViewSet(UserViewSet):
+def delete_locked(queryset):
+    """
+    Удаляет запись из queryset, предварительно заблокировав ее строку.
+
+    Из одновременных запросов на удаление одной записи удаляет ее только
+    первый, поэтому обработчики сигналов срабатывают ровно один раз.
+    Возвращает True, если запись была удалена.
+
+    SQLite не поддерживает SELECT ... FOR UPDATE: транзакция, начатая
+    чтением, не может дождаться блокировки на запись. Поэтому там первым
+    выполняется пустое обновление, которое сразу берет эту блокировку.
+    """
+    with transaction.atomic():
+        if not connection.features.has_select_for_update:
+            pk = queryset.model._meta.pk.name
+            queryset.update(**{pk: F(pk)})
+        instance = queryset.select_for_update().first()
+        if instance is None:
+            return False
+        instance.delete()
+        return True
+
+
+class ActionUserViewSet(OptionalCursorPaginationMixin, UserViewSet):
     """
     Набор представлений для работы с User и Subscribe.
     """
     queryset = User.objects.all()
     serializer_class = SubscribeDetailSerializer
     pagination_class = FoodgramPageNumberPagination
+    cursor_pagination_class = SubscriptionsCursorPagination
 
     @action(
         methods=['post'],
@@ -68,14 +105,27 @@ class ActionUserViewSet(UserViewSet):
         Получает список подписок текущего пользователя.
         """
         user = request.user
-        queryset = User.objects.filter(following__user=user)
-        pages = self.paginate_queryset(queryset)
+        limit = get_recipes_limit(request)
+        queryset = User.objects.filter(following__user=user).annotate(
+            is_subscribed=Value(True, output_field=BooleanField())
+        )
+        page = self.paginate_queryset(queryset)
+        authors = list(queryset) if page is None else page
+        recipes = Recipes.objects.filter(author__in=authors)
+        if limit is not None:
+            recipes = recipes.top_per_author(limit)
+        prefetch_related_objects(
+            authors,
+            Prefetch('recipes', queryset=recipes, to_attr='limited_recipes')
+        )
         serializer = SubscribeDetailSerializer(
-            pages,
+            authors,
             many=True,
             context={'request': request}
         )
-        return self.get_paginated_response(serializer.data)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
 
     @action(
         methods=['post', 'delete'],
@@ -92,44 +142,40 @@ class ActionUserViewSet(UserViewSet):
         if user.is_anonymous:
             return Response(status=HTTP_401_UNAUTHORIZED)
 
-        try:
-            if request.method == 'POST':
-                if user == author:
-                    data = {'errors': 'Невозможно подписаться на самого себя!'}
-                    return Response(
-                        data=data,
-                        status=HTTP_400_BAD_REQUEST
-                    )
-
-                Subscribe.objects.create(user=user, author=author)
-                serializer = SubscribeDetailSerializer(
-                    author,
-                    context={'request': request}
-                )
+        if request.method == 'POST':
+            if user == author:
+                data = {'errors': 'Невозможно подписаться на самого себя!'}
                 return Response(
-                    serializer.data,
-                    status=HTTP_201_CREATED
+                    data=data,
+                    status=HTTP_400_BAD_REQUEST
                 )
 
-            elif request.method == 'DELETE':
-                subscribe = Subscribe.objects.filter(user=user, author=author)
-                if subscribe.exists():
-                    subscribe.delete()
-                    return Response(status=HTTP_204_NO_CONTENT)
-                else:
-                    data = {'errors': 'Данная подписка не существует!'}
-                    return Response(
-                        data=data,
-                        status=HTTP_400_BAD_REQUEST
-                    )
-
-        except IntegrityError:
-            data = {'errors': 'Вы уже подписались на этого пользователя!'}
+            try:
+                with transaction.atomic():
+                    Subscribe.objects.create(user=user, author=author)
+            except IntegrityError:
+                data = {'errors': 'Вы уже подписались на этого пользователя!'}
+                return Response(
+                    data=data,
+                    status=HTTP_400_BAD_REQUEST
+                )
+            serializer = SubscribeDetailSerializer(
+                author,
+                context={'request': request}
+            )
             return Response(
-                data=data,
-                status=HTTP_400_BAD_REQUEST
+                serializer.data,
+                status=HTTP_201_CREATED
             )
 
+        if delete_locked(Subscribe.objects.filter(user=user, author=author)):
+            return Response(status=HTTP_204_NO_CONTENT)
+        data = {'errors': 'Данная подписка не существует!'}
+        return Response(
+            data=data,
+            status=HTTP_400_BAD_REQUEST
+        )
+
     def get_serializer_context(self):
         """
         Возвращает контекст для сериализатора текущего запроса.
@@ -166,26 +212,40 @@ class ActionUserViewSet(UserViewSet):
         return self.me(request)
 
 
-class TimeTagViewSet(ReadOnlyModelViewSet):
+class TimeTagViewSet(ConditionalCatalogMixin, ReadOnlyModelViewSet):
     """
     Набор представлений для работы с TimeTag.
     """
+    catalog = TAGS_CATALOG
     queryset = TimeTag.objects.all()
     serializer_class = TimeTagSerializer
     permission_classes = (AuthorOrReadOnly,)
 
 
-class IngredientsViewSet(ReadOnlyModelViewSet):
+class IngredientsViewSet(ConditionalCatalogMixin, ReadOnlyModelViewSet):
     """
     Набор представлений для работы с Ingredients.
     """
+    catalog = INGREDIENTS_CATALOG
     queryset = Ingredients.objects.all()
     serializer_class = IngredientsSerializer
     filter_backends = (DjangoFilterBackend,)
     filterset_class = IngredientsFilter
 
+    def list(self, request, *args, **kwargs):
+        """
+        Возвращает список ингредиентов.
+
+        Поиск по началу названия обслуживается индексом в памяти
+        процесса без обращения к базе данных.
+        """
+        name = request.query_params.get('name')
+        if name is None:
+            return super().list(request, *args, **kwargs)
+        return Response(ingredient_index.search(name))
 
-class RecipesViewSet(ModelViewSet):
+
+class RecipesViewSet(OptionalCursorPaginationMixin, ModelViewSet):
     """
     Набор представлений для работы с Recipes.
     """
@@ -196,6 +256,21 @@ class RecipesViewSet(ModelViewSet):
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipesFilter
 
+    def get_queryset(self):
+        """
+        Возвращает queryset рецептов.
+
+        Для чтения подгружает связанные объекты и признаки избранного
+        и корзины, чтобы страница любого размера стоила фиксированного
+        числа запросов.
+        """
+        queryset = super().get_queryset()
+        if self.request.method in SAFE_METHODS:
+            queryset = queryset.with_related().with_user_flags(
+                self.request.user
+            )
+        return queryset
+
     def perform_create(self, serializer):
         """
         Сохраняет автора при создании рецепта.
@@ -210,6 +285,84 @@ class RecipesViewSet(ModelViewSet):
             return RecipesSerializer
         return CreateRecipeSerializer
 
+    @action(
+        detail=False,
+        permission_classes=[IsAuthenticated]
+    )
+    def feed(self, request):
+        """
+        Возвращает ленту рецептов авторов, на которых подписан
+        пользователь, с пагинацией по курсору.
+        """
+        queryset = self.filter_queryset(
+            feed_queryset(request.user).with_related().with_user_flags(
+                request.user
+            )
+        )
+        paginator = FoodgramCursorPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = RecipesSerializer(
+            page,
+            many=True,
+            context={'request': request}
+        )
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False)
+    def cookable(self, request):
+        """
+        Возвращает рецепты, которые можно приготовить из переданных
+        ингредиентов, по убыванию доли покрытия.
+
+        Параметры: ingredients (id ингредиента, можно повторять) и
+        coverage — минимальный процент ингредиентов рецепта, который
+        должен входить в переданный набор (по умолчанию 100).
+        """
+        params = PantrySearchSerializer(data={
+            'ingredients': request.query_params.getlist('ingredients'),
+            'coverage': request.query_params.get('coverage', 100),
+        })
+        params.is_valid(raise_exception=True)
+        matches = pantry_index.search(
+            params.validated_data['ingredients'],
+            params.validated_data['coverage']
+        )
+        return self.ranked_recipes_response(request, matches)
+
+    @action(detail=True)
+    def similar(self, request, pk=None):
+        """
+        Возвращает рецепты с похожим набором ингредиентов по убыванию
+        оценки сходства.
+        """
+        recipe = self.get_object()
+        return self.ranked_recipes_response(
+            request, similar_recipes(recipe.id)
+        )
+
+    def ranked_recipes_response(self, request, matches):
+        """
+        Общий метод для выдачи рецептов в заранее вычисленном порядке.
+
+        matches — список пар (id рецепта, оценка); из базы загружаются
+        только рецепты текущей страницы.
+        """
+        paginator = FoodgramPageNumberPagination()
+        page = paginator.paginate_queryset(matches, request, view=self)
+        recipe_ids = [
+            recipe_id for recipe_id, _ in (matches if page is None else page)
+        ]
+        recipes = self.get_queryset().in_bulk(recipe_ids)
+        serializer = RecipesSerializer(
+            [recipes[recipe_id] for recipe_id in recipe_ids
+             if recipe_id in recipes],
+            many=True,
+            context={'request': request}
+        )
+        if page is not None:
+            return paginator.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
     @action(
         methods=['post', 'delete'],
         detail=True,
@@ -243,14 +396,20 @@ class RecipesViewSet(ModelViewSet):
     def post_recipe(self, model, user, pk):
         """
         Общий метод для добавления рецепта в список (избранное, покупки).
+
+        Повторное добавление отсекает уникальное ограничение таблицы,
+        поэтому одновременные запросы не создают дублей и не приводят
+        к ошибке сервера.
         """
-        if model.objects.filter(user=user, recipe_id=pk).exists():
+        recipe = get_object_or_404(Recipes, id=pk)
+        try:
+            with transaction.atomic():
+                model.objects.create(user=user, recipe=recipe)
+        except IntegrityError:
             return Response(
                 {'errors': 'Вы уже добавили этот рецепт'},
                 status=HTTP_400_BAD_REQUEST
             )
-        recipe = get_object_or_404(Recipes, id=pk)
-        model.objects.create(user=user, recipe=recipe)
         serializer = SubscribeRecipesSerializer(recipe)
         return Response(serializer.data, status=HTTP_201_CREATED)
 
@@ -258,9 +417,7 @@ class RecipesViewSet(ModelViewSet):
         """
         Общий метод для удаления рецепта из списка (избранное, покупки).
         """
-        obj = model.objects.filter(user=user, recipe__id=pk)
-        if obj.exists():
-            obj.delete()
+        if delete_locked(model.objects.filter(user=user, recipe_id=pk)):
             return Response(status=HTTP_204_NO_CONTENT)
         return Response(
             {'errors': 'Вы уже удалили этот рецепт'},
@@ -270,31 +427,40 @@ class RecipesViewSet(ModelViewSet):
     @action(
         methods=['get'],
         detail=False,
-        permission_classes=[IsAuthenticated]
+        permission_classes=[IsAuthenticated],
+        renderer_classes=[ShoplistTextRenderer, ShoplistCSVRenderer,
+                          ShoplistJSONRenderer],
+        content_negotiation_class=FormatParameterNegotiation
     )
     def download_shopping_cart(self, request):
         """
         Формирует файл со списком покупок для скачивания.
+
+        Формат файла выбирается параметром format (txt, csv, json),
+        файл отдается потоком по мере чтения строк из базы данных.
         """
         cart_ingredients = (
-            RecipeIngredients.objects.filter(
-                recipe__shoplist__user=request.user
-            ).values(
+            ShoplistIngredients.objects.filter(
+                user=request.user
+            ).values_list(
+                'ingredient__name',
+                'amount',
+                'ingredient__measurement_unit',
+            ).order_by(
                 'ingredient__name',
                 'ingredient__measurement_unit',
-            ).annotate(cart_amount=Sum('amount'))
+            )
+        )
+        items = (
+            {'name': name, 'amount': amount, 'measurement_unit': unit}
+            for name, amount, unit in cart_ingredients.iterator()
         )
 
-        shoplist = ''
-        for num, item in enumerate(cart_ingredients):
-            name = item['ingredient__name']
-            measurement_unit = item['ingredient__measurement_unit']
-            amount = item['cart_amount']
-            shoplist += (f'{num + 1}. {name} - '
-                         f'{amount} {measurement_unit} \n')
-
-        filename = 'shoplist.txt'
-        response = HttpResponse(shoplist,
-                                content_type='text/plain,charset=utf8')
+        renderer = request.accepted_renderer
+        filename = f'shoplist.{renderer.format}'
+        response = StreamingHttpResponse(
+            renderer.stream(items),
+            content_type=renderer.content_type
+        )
         response['Content-Disposition'] = f'attachment; filename={filename}'
         return response
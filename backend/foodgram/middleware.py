@@ -0,0 +1,60 @@
+from rest_framework.permissions import SAFE_METHODS
+
+from foodgram.routers import replica_databases, replica_reads
+from foodgram.settings import REPLICA_PIN_SECONDS
+
+REPLICA_PIN_COOKIE = 'replica_pin'
+
+
+def is_pinned(request):
+    """
+    Проверяет, закреплен ли клиент за основной базой.
+
+    Подпись cookie хранит время ее выдачи, поэтому просроченное или
+    подделанное закрепление не действует.
+    """
+    return request.get_signed_cookie(
+        REPLICA_PIN_COOKIE,
+        default=None,
+        salt=REPLICA_PIN_COOKIE,
+        max_age=REPLICA_PIN_SECONDS
+    ) is not None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Разрешает чтение с реплик для безопасных запросов.
+
+    После успешного запроса на изменение клиент получает подписанную
+    cookie и, пока она действует (REPLICA_PIN_SECONDS секунд), читает
+    из основной базы, чтобы видеть свои изменения несмотря на задержку
+    репликации. Закрепление хранится у клиента, поэтому его проверка
+    не обращается ни к базе, ни к общему кэшу, и закрепляется только
+    сам клиент, а не все клиенты за тем же прокси.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not replica_databases():
+            return self.get_response(request)
+
+        safe = request.method in SAFE_METHODS
+        token = replica_reads.set(safe and not is_pinned(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            replica_reads.reset(token)
+
+        if not safe and response.status_code < 400:
+            response.set_signed_cookie(
+                REPLICA_PIN_COOKIE,
+                '1',
+                salt=REPLICA_PIN_COOKIE,
+                max_age=REPLICA_PIN_SECONDS,
+                secure=request.is_secure(),
+                httponly=True,
+                samesite='Lax'
+            )
+        return response
@@ -0,0 +1,38 @@
+from django.db.migrations import AddIndex
+
+
+class AddIndexConcurrently(AddIndex):
+    """
+    Создает индекс без блокировки записи в таблицу на PostgreSQL
+    (CREATE INDEX CONCURRENTLY), на остальных СУБД — как AddIndex.
+
+    Миграция с этой операцией должна быть объявлена с atomic = False.
+    """
+
+    def describe(self):
+        return (
+            f'Concurrently create index {self.index.name} '
+            f'on {self.model_name}'
+        )
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            super().database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+            return
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.add_index(model, self.index, concurrently=True)
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            super().database_backwards(
+                app_label, schema_editor, from_state, to_state
+            )
+            return
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.remove_index(model, self.index, concurrently=True)
@@ -0,0 +1,55 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+PRIMARY_DATABASE = 'default'
+
+replica_reads = ContextVar('replica_reads', default=False)
+
+
+def replica_databases():
+    """
+    Возвращает псевдонимы баз данных-реплик.
+    """
+    return [alias for alias in settings.DATABASES if alias != PRIMARY_DATABASE]
+
+
+@contextmanager
+def primary_reads():
+    """
+    Направляет чтение внутри блока в основную базу данных.
+    """
+    token = replica_reads.set(False)
+    try:
+        yield
+    finally:
+        replica_reads.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Маршрутизатор, отправляющий чтение на реплики, а запись в основную
+    базу данных.
+
+    Чтение уходит на реплику, только если это разрешено для текущего
+    запроса (см. ReplicaRoutingMiddleware). Команды управления, запросы
+    на изменение и клиенты, недавно изменявшие данные, читают из
+    основной базы.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = replica_databases()
+        if replicas and replica_reads.get():
+            return random.choice(replicas)
+        return PRIMARY_DATABASE
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY_DATABASE
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY_DATABASE
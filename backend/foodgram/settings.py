@@ -44,6 +44,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'foodgram.middleware.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -87,6 +88,33 @@ else:
             'PORT': os.getenv('DB_PORT', 5432)
         }
     }
+    for number, host in enumerate(
+        filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), start=1
+    ):
+        DATABASES[f'replica_{number}'] = {
+            **DATABASES['default'],
+            'HOST': host.strip(),
+            'TEST': {'MIRROR': 'default'},
+        }
+
+DATABASE_ROUTERS = ['foodgram.routers.ReplicaRouter']
+
+# The 'shared' cache is visible to all processes. The default database cache
+# creates its table on migrate and costs a query per read, so deployments
+# with several workers should point it at memcached via SHARED_CACHE_BACKEND
+# and SHARED_CACHE_LOCATION
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': os.getenv(
+            'SHARED_CACHE_BACKEND',
+            'django.core.cache.backends.db.DatabaseCache'
+        ),
+        'LOCATION': os.getenv('SHARED_CACHE_LOCATION', 'shared_cache'),
+    },
+}
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -148,7 +176,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
 }
 
@@ -213,3 +241,41 @@ ALLOWED_ACTIONS = ('get', 'post', 'patch', 'delete', 'head', 'options', 'trace')
 
 # Minimum number of related objects
 MININUN_NUM: int = 1
+
+# Default number of objects on a cursor-paginated page
+CURSOR_PAGE_SIZE: int = 6
+
+# Number of seconds clients may reuse catalog responses without revalidation
+CATALOG_CACHE_MAX_AGE: int = 60
+
+# Number of seconds a process reuses a catalog version read from the
+# database before checking it again
+CATALOG_VERSION_TTL: float = 1.0
+
+# Number of recent recipe ingredient changes kept for processes whose
+# pantry index fell behind; a larger gap rebuilds the index
+PANTRY_LOG_SIZE: int = 10000
+
+# Number of followers from which an author's recipes are not copied into
+# follower feeds on publish and are read from the recipes table instead
+FEED_FANOUT_LIMIT: int = 10000
+
+# Half-life of a favorite or shopping-list addition in the popularity score
+RANKING_HALF_LIFE_HOURS: int = 72
+RANKING_FAVORITE_WEIGHT: float = 1.0
+RANKING_SHOPLIST_WEIGHT: float = 0.5
+
+# Authenticated tokens are kept in a per-process LRU of this size for at most
+# AUTH_TOKEN_CACHE_TTL seconds; AUTH_TOKEN_SHARED_CACHE names an entry of
+# CACHES shared between processes (disabled when empty). Revoked tokens are
+# marked in the AUTH_TOKEN_REVOCATION_CACHE entry of CACHES, which must be
+# shared between processes and is read on every authenticated request
+AUTH_TOKEN_CACHE_SIZE: int = 1024
+AUTH_TOKEN_CACHE_TTL: int = 30
+AUTH_TOKEN_SHARED_CACHE = os.getenv('AUTH_TOKEN_SHARED_CACHE', '')
+AUTH_TOKEN_REVOCATION_CACHE = 'shared'
+
+# Number of seconds a client reads from the primary database after a write,
+# so that it sees its own changes despite replication lag; the pin is a signed
+# cookie, so checking it needs neither the database nor a shared cache
+REPLICA_PIN_SECONDS: int = int(os.getenv('REPLICA_PIN_SECONDS', 5))
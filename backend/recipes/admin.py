@@ -3,6 +3,8 @@ from django.contrib import admin
 from foodgram.settings import MININUN_NUM
 from .models import (Favorites, Ingredients, Recipes,
                      Shoplist, TimeTag, RecipeIngredients)
+from .paginators import EstimatedCountPaginator
+from .shoplist import recipe_amounts, update_recipe_in_shoplists
 
 
 class RecipeIngredientsInline(admin.TabularInline):
@@ -14,6 +16,7 @@ class RecipeIngredientsInline(admin.TabularInline):
     min_num = MININUN_NUM
     validate_min = True
     extra = MININUN_NUM
+    autocomplete_fields = ('ingredient',)
 
 
 @admin.register(Ingredients)
@@ -26,9 +29,11 @@ class IngredientsAdmin(admin.ModelAdmin):
         'name',
         'measurement_unit',
     ]
-    list_filter = ('name',)
-    search_fields = ('name',)
-    inlines = (RecipeIngredientsInline,)
+    list_filter = ('measurement_unit',)
+    search_fields = ('^name',)
+    ordering = ('name', 'id')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(TimeTag)
@@ -57,22 +62,34 @@ class RecipesAdmin(admin.ModelAdmin):
         'author',
         'favorite_counter'
     )
+    list_select_related = ('author',)
     search_fields = (
-        'name',
-        'author',
-        'tags'
-    )
-    list_filter = (
-        'name',
-        'author',
-        'tags'
+        '^name',
+        '^author__username',
     )
+    list_filter = ('tags',)
+    autocomplete_fields = ('author', 'tags')
     inlines = (RecipeIngredientsInline,)
     ordering = ('-id',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
-    @admin.display(description='Находится в избранном')
+    def save_related(self, request, form, formsets, change):
+        """
+        Сохраняет ингредиенты рецепта и переносит их изменение
+        в списки покупок.
+        """
+        old_amounts = recipe_amounts(form.instance.id) if change else {}
+        super().save_related(request, form, formsets, change)
+        if change:
+            update_recipe_in_shoplists(form.instance.id, old_amounts)
+
+    @admin.display(
+        description='Находится в избранном',
+        ordering='favorites_count'
+    )
     def favorite_counter(self, obj):
-        return obj.favorites.all().count()
+        return obj.favorites_count
 
 
 @admin.register(Favorites)
@@ -85,8 +102,11 @@ class FavoritesAdmin(admin.ModelAdmin):
         'user',
         'recipe'
     )
-    search_fields = ('user',)
-    list_filter = ('user',)
+    list_select_related = ('user', 'recipe')
+    search_fields = ('^user__username',)
+    autocomplete_fields = ('user', 'recipe')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(Shoplist)
@@ -99,5 +119,8 @@ class ShoplistAdmin(admin.ModelAdmin):
         'user',
         'recipe'
     )
-    search_fields = ('user',)
-    list_filter = ('user',)
+    list_select_related = ('user', 'recipe')
+    search_fields = ('^user__username',)
+    autocomplete_fields = ('user', 'recipe')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -0,0 +1,60 @@
+import time
+
+from django.db import transaction
+from django.db.models import F
+from foodgram.settings import CATALOG_VERSION_TTL
+from recipes.models import CatalogVersion
+
+INGREDIENTS_CATALOG = 'ingredients'
+TAGS_CATALOG = 'tags'
+RECIPE_INGREDIENTS_CATALOG = 'recipe_ingredients'
+
+# Версии, прочитанные этим процессом: имя -> (версия, время чтения).
+_versions = {}
+
+
+def get_catalog_version(name):
+    """
+    Возвращает текущую версию справочника.
+
+    Версии хранятся в базе данных и общие для веб-процессов и команд
+    управления. Прочитанная версия используется процессом не дольше
+    CATALOG_VERSION_TTL секунд, поэтому частые проверки, например при
+    автодополнении, почти не обращаются к базе.
+    """
+    now = time.monotonic()
+    cached = _versions.get(name)
+    if cached is not None and now - cached[1] < CATALOG_VERSION_TTL:
+        return cached[0]
+    version = CatalogVersion.objects.filter(name=name).values_list(
+        'version', flat=True
+    ).first() or 0
+    _versions[name] = (version, now)
+    return version
+
+
+def bump_catalog_version(name, callback=None, record=None):
+    """
+    Увеличивает версию справочника после фиксации текущей транзакции.
+
+    Если передан record, он вызывается с новой версией в той же
+    транзакции, в которой она увеличивается. Если передан callback,
+    он вызывается с новой версией после ее фиксации.
+    """
+    def bump():
+        with transaction.atomic():
+            # Начальное значение берется из времени, поэтому после
+            # очистки базы новые версии не совпадут с прежними ETag.
+            CatalogVersion.objects.get_or_create(
+                name=name, defaults={'version': time.time_ns()}
+            )
+            versions = CatalogVersion.objects.filter(name=name)
+            versions.update(version=F('version') + 1)
+            version = versions.values_list('version', flat=True).get()
+            if record is not None:
+                record(version)
+        _versions[name] = (version, time.monotonic())
+        if callback is not None:
+            callback(version)
+
+    transaction.on_commit(bump)
@@ -0,0 +1,51 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from recipes.models import Favorites, Recipes, Shoplist
+from users.models import Subscribe, User
+
+# Счетчики: модель, поле счетчика, подсчитываемая модель и ее внешний ключ.
+COUNTERS = (
+    (Recipes, 'favorites_count', Favorites, 'recipe'),
+    (Recipes, 'in_carts_count', Shoplist, 'recipe'),
+    (User, 'recipes_count', Recipes, 'author'),
+    (User, 'followers_count', Subscribe, 'author'),
+)
+
+
+def change_counter(model, pk, field, delta):
+    """
+    Атомарно изменяет счетчик field у объекта model на delta.
+    """
+    if pk is None:
+        return
+    value = F(field) + delta
+    if delta < 0:
+        value = Greatest(value, 0)
+    model.objects.filter(pk=pk).update(**{field: value})
+
+
+def actual_count(related_model, foreign_key):
+    """
+    Возвращает подзапрос с фактическим количеством связанных строк.
+    """
+    return Coalesce(Subquery(
+        related_model.objects.filter(
+            **{foreign_key: OuterRef('pk')}
+        ).order_by().values(foreign_key).annotate(
+            total=Count('pk')
+        ).values('total')
+    ), 0)
+
+
+def reconcile_counter(model, field, related_model, foreign_key):
+    """
+    Исправляет расхождения счетчика с фактическими данными.
+    Возвращает количество исправленных строк.
+    """
+    drifted = model.objects.annotate(
+        actual=actual_count(related_model, foreign_key)
+    ).exclude(**{field: F('actual')}).values('pk')
+    return model.objects.filter(pk__in=Subquery(drifted)).update(
+        **{field: actual_count(related_model, foreign_key)}
+    )
@@ -0,0 +1,121 @@
+from itertools import islice
+
+from django.db import connection
+from django.db.models import Q
+from foodgram.settings import FEED_FANOUT_LIMIT
+from recipes.models import FeedEntry, Recipes
+from users.models import Subscribe, User
+
+BATCH_SIZE = 1000
+
+
+def is_popular(author_id):
+    """
+    Проверяет, читаются ли рецепты автора в момент запроса ленты
+    (fan-out on read) вместо копирования в ленты подписчиков.
+    """
+    return User.objects.filter(
+        pk=author_id, followers_count__gte=FEED_FANOUT_LIMIT
+    ).exists()
+
+
+def create_entries(entries):
+    """
+    Сохраняет записи ленты пачками, пропуская уже существующие.
+    """
+    entries = iter(entries)
+    while True:
+        batch = list(islice(entries, BATCH_SIZE))
+        if not batch:
+            return
+        FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def fan_out_recipe(recipe):
+    """
+    Добавляет новый рецепт в ленты подписчиков автора.
+    """
+    if recipe.author_id is None:
+        return
+    fan_out_recipes({recipe.author_id: [recipe.id]})
+
+
+def fan_out_recipes(recipes_by_author):
+    """
+    Добавляет новые рецепты в ленты подписчиков их авторов.
+
+    Принимает словарь id автора -> id его новых рецептов. Рецепты
+    популярных авторов не копируются, они читаются в момент запроса.
+    """
+    authors = User.objects.filter(
+        pk__in=recipes_by_author, followers_count__lt=FEED_FANOUT_LIMIT
+    ).values('pk')
+    create_entries(
+        FeedEntry(user_id=user_id, recipe_id=recipe_id, author_id=author_id)
+        for author_id, user_id in Subscribe.objects.filter(
+            author_id__in=authors
+        ).values_list('author_id', 'user_id').iterator()
+        for recipe_id in recipes_by_author[author_id]
+    )
+
+
+def backfill_subscription(user_id, author_id):
+    """
+    Добавляет рецепты автора в ленту нового подписчика.
+    """
+    if is_popular(author_id):
+        return
+    create_entries(
+        FeedEntry(user_id=user_id, recipe_id=recipe_id, author_id=author_id)
+        for recipe_id in Recipes.objects.filter(
+            author_id=author_id
+        ).values_list('id', flat=True).iterator()
+    )
+
+
+def prune_subscription(user_id, author_id):
+    """
+    Удаляет рецепты автора из ленты бывшего подписчика.
+    """
+    FeedEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def feed_queryset(user):
+    """
+    Возвращает рецепты ленты пользователя.
+
+    Основная часть читается из таблицы FeedEntry по индексу
+    (user, recipe), рецепты популярных авторов добавляются из таблицы
+    рецептов в момент чтения.
+    """
+    popular = Subscribe.objects.filter(
+        user=user, author__followers_count__gte=FEED_FANOUT_LIMIT
+    ).values_list('author_id', flat=True)
+    if not popular.exists():
+        return Recipes.objects.filter(feed_entries__user=user)
+    return Recipes.objects.filter(
+        Q(id__in=FeedEntry.objects.filter(user=user).values('recipe_id'))
+        | Q(author_id__in=popular)
+    )
+
+
+def rebuild_feeds():
+    """
+    Пересобирает ленты всех пользователей по текущим подпискам
+    одним запросом INSERT ... SELECT.
+    """
+    FeedEntry.objects.all().delete()
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {quote(FeedEntry._meta.db_table)} '
+            f'(user_id, recipe_id, author_id) '
+            f'SELECT subscribe.user_id, recipe.id, recipe.author_id '
+            f'FROM {quote(Subscribe._meta.db_table)} subscribe '
+            f'JOIN {quote(Recipes._meta.db_table)} recipe '
+            f'ON recipe.author_id = subscribe.author_id '
+            f'JOIN {quote(User._meta.db_table)} author '
+            f'ON author.id = subscribe.author_id '
+            f'WHERE author.followers_count < %s',
+            [FEED_FANOUT_LIMIT]
+        )
@@ -0,0 +1,120 @@
+import logging
+import posixpath
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVES_DIR = 'derivatives'
+
+# Производные изображения рецепта: размер, обрезка до точного размера
+# и формат файла.
+IMAGE_DERIVATIVES = {
+    'thumbnail': {'size': (480, 320), 'crop': True, 'format': 'JPEG'},
+    'thumbnail_webp': {'size': (480, 320), 'crop': True, 'format': 'WEBP'},
+    'image_webp': {'size': (1600, 1600), 'crop': False, 'format': 'WEBP'},
+}
+
+EXTENSIONS = {'JPEG': 'jpg', 'WEBP': 'webp'}
+QUALITY = 82
+
+
+def derivative_name(name, derivative):
+    """
+    Возвращает путь производного изображения в хранилище.
+    """
+    directory, filename = posixpath.split(name)
+    stem = posixpath.splitext(filename)[0]
+    extension = EXTENSIONS[IMAGE_DERIVATIVES[derivative]['format']]
+    return posixpath.join(
+        directory, DERIVATIVES_DIR, f'{stem}_{derivative}.{extension}'
+    )
+
+
+def render_derivative(image, spec):
+    """
+    Возвращает содержимое производного изображения по описанию spec.
+    """
+    if spec['crop']:
+        variant = ImageOps.fit(image, spec['size'], Image.LANCZOS)
+    else:
+        variant = image.copy()
+        variant.thumbnail(spec['size'], Image.LANCZOS)
+    if spec['format'] == 'JPEG' and variant.mode != 'RGB':
+        background = Image.new('RGB', variant.size, 'white')
+        rgba = variant.convert('RGBA')
+        background.paste(rgba, mask=rgba.getchannel('A'))
+        variant = background
+    buffer = BytesIO()
+    variant.save(buffer, spec['format'], quality=QUALITY, optimize=True)
+    return buffer.getvalue()
+
+
+def generate_derivatives(name, storage=default_storage, force=False):
+    """
+    Создает производные изображения для файла name.
+
+    Уже существующие производные пропускаются, если не передан force.
+    Возвращает количество созданных файлов.
+    """
+    targets = {
+        derivative: derivative_name(name, derivative)
+        for derivative in IMAGE_DERIVATIVES
+    }
+    if not force:
+        targets = {
+            derivative: target for derivative, target in targets.items()
+            if not storage.exists(target)
+        }
+    if not targets:
+        return 0
+    with storage.open(name, 'rb') as file:
+        image = Image.open(file)
+        image.load()
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA')
+    for derivative, target in targets.items():
+        content = render_derivative(image, IMAGE_DERIVATIVES[derivative])
+        if storage.exists(target):
+            storage.delete(target)
+        storage.save(target, ContentFile(content))
+    return len(targets)
+
+
+def generate_derivatives_safely(name):
+    """
+    Создает производные изображения, записывая ошибки в журнал
+    вместо их передачи вызывающему коду.
+    """
+    try:
+        generate_derivatives(name)
+    except (OSError, ValueError):
+        logger.exception(f'Не удалось обработать изображение {name}')
+
+
+def is_same_image(image, upload):
+    """
+    Проверяет, совпадает ли загруженный файл upload с уже сохраненным
+    изображением image.
+
+    Содержимое сравнивается, только если совпадают размеры файлов.
+    """
+    if not image:
+        return False
+    try:
+        if image.storage.size(image.name) != upload.size:
+            return False
+        upload.seek(0)
+        with image.storage.open(image.name, 'rb') as stored:
+            for chunk in upload.chunks():
+                if stored.read(len(chunk)) != chunk:
+                    return False
+    except OSError:
+        return False
+    finally:
+        upload.seek(0)
+    return True
@@ -0,0 +1,77 @@
+from bisect import bisect_left
+from threading import Lock
+
+from recipes.catalog import INGREDIENTS_CATALOG, get_catalog_version
+from recipes.models import Ingredients
+
+
+def normalize(value):
+    """
+    Приводит строку к виду для поиска: без учета регистра и без различия
+    между буквами «ё» и «е».
+    """
+    return value.casefold().replace('ё', 'е')
+
+
+class IngredientPrefixIndex:
+    """
+    Отсортированный индекс ингредиентов для поиска по началу названия.
+
+    Индекс строится при первом обращении в каждом процессе и
+    перестраивается, когда меняется версия справочника ингредиентов.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._version = None
+        # Ключи и записи заменяются вместе одним присваиванием, чтобы
+        # поиск без блокировки не увидел ключи одной версии и записи другой.
+        self._entries = ([], [])
+
+    def _build(self):
+        """
+        Загружает ингредиенты из базы и сортирует их по ключу поиска.
+        """
+        rows = sorted(
+            (normalize(name), name, measurement_unit, pk)
+            for pk, name, measurement_unit in Ingredients.objects.values_list(
+                'id', 'name', 'measurement_unit'
+            )
+        )
+        keys = [row[0] for row in rows]
+        items = [
+            {'id': pk, 'name': name, 'measurement_unit': measurement_unit}
+            for _, name, measurement_unit, pk in rows
+        ]
+        return keys, items
+
+    def _ensure_fresh(self):
+        """
+        Перестраивает индекс, если справочник изменился.
+        """
+        version = get_catalog_version(INGREDIENTS_CATALOG)
+        if version == self._version:
+            return
+        with self._lock:
+            if version == self._version:
+                return
+            self._entries = self._build()
+            self._version = version
+
+    def search(self, prefix):
+        """
+        Возвращает ингредиенты, название которых начинается с prefix.
+
+        Точные совпадения идут первыми, остальные упорядочены по названию.
+        """
+        self._ensure_fresh()
+        keys, items = self._entries
+        prefix = normalize(prefix)
+        start = bisect_left(keys, prefix)
+        end = start
+        while end < len(keys) and keys[end].startswith(prefix):
+            end += 1
+        return items[start:end]
+
+
+ingredient_index = IngredientPrefixIndex()
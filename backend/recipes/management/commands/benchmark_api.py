@@ -0,0 +1,486 @@
+import base64
+import io
+import json
+import logging
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import combinations
+from pathlib import Path
+from urllib.parse import quote
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.db.models import Count
+from django.test.utils import (CaptureQueriesContext, setup_test_environment,
+                               teardown_test_environment)
+from PIL import Image
+from recipes.images import IMAGE_DERIVATIVES, derivative_name
+from recipes.models import (Ingredients, RecipeIngredients, Recipes,
+                            Shoplist, TimeTag)
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from users.models import User
+
+logger = logging.getLogger(__name__)
+
+PAGE = 'limit=6'
+
+
+def placeholder_image():
+    """
+    Возвращает маленькое изображение в формате data URI для создания
+    рецептов.
+    """
+    buffer = io.BytesIO()
+    Image.new('RGB', (8, 8), '#49B64E').save(buffer, 'PNG')
+    encoded = base64.b64encode(buffer.getvalue()).decode()
+    return f'data:image/png;base64,{encoded}'
+
+
+def percentile(samples, percent):
+    """
+    Возвращает перцентиль выборки с линейной интерполяцией.
+    """
+    ordered = sorted(samples)
+    position = (len(ordered) - 1) * percent / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (
+        ordered[upper] - ordered[lower]
+    ) * (position - lower)
+
+
+def letters(number):
+    """
+    Записывает номер буквами: названия рецептов не допускают цифр.
+    """
+    alphabet = 'абвгдежзиклмнопрстуфхцчшэюя'
+    word = ''
+    while True:
+        number, digit = divmod(number, len(alphabet))
+        word = alphabet[digit] + word
+        if not number:
+            return word
+
+
+class Scenario:
+    """
+    Сценарий нагрузки: запрос к одному эндпоинту API.
+
+    request(number) возвращает метод, путь и тело number-го запроса.
+    Сценарии с write=True выполняются последовательно в транзакции,
+    которая откатывается после замера. Обработчики on_commit каждого
+    запроса выполняются сразу после него и входят в замер.
+    """
+
+    def __init__(self, name, request, expected, auth=False, write=False):
+        self.name = name
+        self.request = request
+        self.expected = expected
+        self.auth = auth
+        self.write = write
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержки (p50, p95, p99), пропускную способность и '
+        'количество запросов к базе для основных эндпоинтов API на текущих '
+        'данных. Сохраняет результаты в JSON и сравнивает их с базовыми.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--baseline',
+            default='api_baseline.json',
+            help='Файл с базовыми результатами.'
+        )
+        parser.add_argument(
+            '--save',
+            action='store_true',
+            help='Записать результаты как базовые вместо сравнения.'
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=0.2,
+            help='Допустимый рост p95 относительно базового (доля).'
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=30,
+            help='Количество замеряемых запросов в сценарии.'
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=3,
+            help='Количество прогревочных запросов в сценарии.'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=1,
+            help='Количество потоков для сценариев чтения.'
+        )
+        parser.add_argument(
+            '--only',
+            help='Запускать только сценарии, в названии которых есть строка.'
+        )
+
+    def handle(self, *args, **options):
+        # Тестовое окружение разрешает хост тестового клиента.
+        setup_test_environment()
+        try:
+            results = self.benchmark(options)
+        finally:
+            teardown_test_environment()
+
+        path = Path(options['baseline'])
+        if options['save']:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(
+                json.dumps(results, ensure_ascii=False, indent=2),
+                encoding='utf-8'
+            )
+            logger.info(f'Базовые результаты записаны в {path}')
+            return
+        if not path.exists():
+            logger.info(
+                f'Файл {path} не найден, сравнение пропущено. '
+                f'Запустите команду с --save, чтобы создать его.'
+            )
+            return
+        baseline = json.loads(path.read_text(encoding='utf-8'))
+        regressions = self.compare(results, baseline, options['threshold'])
+        if regressions:
+            raise CommandError(
+                'Обнаружены регрессии:\n' + '\n'.join(regressions)
+            )
+        logger.info('Регрессий относительно базовых результатов нет')
+
+    def benchmark(self, options):
+        self.user = self.get_user()
+        self.token = Token.objects.get_or_create(user=self.user)[0].key
+        results = {}
+        for scenario in self.scenarios():
+            if options['only'] and options['only'] not in scenario.name:
+                continue
+            results[scenario.name] = self.run(scenario, options)
+            self.report(scenario.name, results[scenario.name])
+        return results
+
+    def get_user(self):
+        """
+        Возвращает пользователя с наибольшим числом подписок: его лента,
+        подписки и корзина дают самые тяжелые запросы.
+        """
+        user = User.objects.annotate(
+            subscriptions=Count('follower')
+        ).order_by('-subscriptions', 'id').first()
+        if user is None:
+            raise CommandError(
+                'В базе данных нет пользователей, заполните ее командой '
+                'seed_scale'
+            )
+        return user
+
+    def client(self, auth):
+        client = APIClient()
+        if auth:
+            client.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+        return client
+
+    def scenarios(self):
+        recipe = Recipes.objects.order_by('-favorites_count', '-id').first()
+        if recipe is None:
+            raise CommandError(
+                'В базе данных нет рецептов, заполните ее командой seed_scale'
+            )
+        tag = TimeTag.objects.order_by('id').first()
+        author = User.objects.order_by('-recipes_count', 'id').first()
+        ingredient_ids = list(RecipeIngredients.objects.filter(
+            recipe=recipe
+        ).values_list('ingredient_id', flat=True))
+        prefix = Ingredients.objects.order_by('id').values_list(
+            'name', flat=True
+        ).first()[:2]
+        if not Shoplist.objects.filter(user=self.user).exists():
+            logger.warning(
+                'Корзина пользователя пуста, download_shopping_cart '
+                'замеряется на пустом списке'
+            )
+
+        filters = {
+            'tags': f'tags={tag.slug}' if tag else None,
+            'author': f'author={author.id}',
+            'is_favorited': 'is_favorited=1',
+            'is_in_shopping_cart': 'is_in_shopping_cart=1',
+            'search': f'search={quote("Суп")}',
+            'ordering': 'ordering=popular',
+        }
+        filters = {name: value for name, value in filters.items() if value}
+        for auth in (False, True):
+            who = 'auth' if auth else 'anon'
+            for size in range(len(filters) + 1):
+                for names in combinations(filters, size):
+                    query = '&'.join(
+                        [PAGE] + [filters[name] for name in names]
+                    )
+                    yield Scenario(
+                        f'recipes list [{who}] {"+".join(names) or "-"}',
+                        lambda number, query=query: (
+                            'get', f'/api/recipes/?{query}', None
+                        ),
+                        200,
+                        auth=auth
+                    )
+            yield Scenario(
+                f'recipe detail [{who}]',
+                lambda number: ('get', f'/api/recipes/{recipe.id}/', None),
+                200,
+                auth=auth
+            )
+        yield Scenario(
+            'subscriptions',
+            lambda number: (
+                'get', f'/api/users/subscriptions/?{PAGE}&recipes_limit=3',
+                None
+            ),
+            200,
+            auth=True
+        )
+        yield Scenario(
+            'ingredients autocomplete',
+            lambda number: ('get', f'/api/ingredients/?name={prefix}', None),
+            200
+        )
+        yield Scenario(
+            'feed',
+            lambda number: ('get', f'/api/recipes/feed/?{PAGE}', None),
+            200,
+            auth=True
+        )
+        yield Scenario(
+            'cookable',
+            lambda number: (
+                'get',
+                '/api/recipes/cookable/?coverage=50&' + '&'.join(
+                    f'ingredients={pk}' for pk in ingredient_ids
+                ) + f'&{PAGE}',
+                None
+            ),
+            200
+        )
+        yield Scenario(
+            'similar',
+            lambda number: (
+                'get', f'/api/recipes/{recipe.id}/similar/?{PAGE}', None
+            ),
+            200
+        )
+        yield Scenario(
+            'download_shopping_cart',
+            lambda number: (
+                'get', '/api/recipes/download_shopping_cart/?format=txt',
+                None
+            ),
+            200,
+            auth=True
+        )
+
+        image = placeholder_image()
+        ingredients = [
+            {'id': pk, 'amount': 10 + index}
+            for index, pk in enumerate(ingredient_ids[:5])
+        ]
+        tags = [tag.id] if tag else []
+        yield Scenario(
+            'recipe create',
+            lambda number: ('post', '/api/recipes/', {
+                'name': f'Замер {letters(number)}',
+                'text': 'Рецепт для замера производительности.',
+                'cooking_time': 10,
+                'image': image,
+                'tags': tags,
+                'ingredients': ingredients,
+            }),
+            201,
+            auth=True,
+            write=True
+        )
+        yield Scenario(
+            'recipe update',
+            lambda number: ('patch', f'/api/recipes/{self.own_recipe}/', {
+                'name': f'Замер изменения {letters(number)}',
+                'tags': tags,
+                'ingredients': ingredients[number % 2:],
+            }),
+            200,
+            auth=True,
+            write=True
+        )
+        for action in ('favorite', 'shopping_cart'):
+            yield Scenario(
+                f'{action} toggle',
+                lambda number, action=action: (
+                    'post' if number % 2 == 0 else 'delete',
+                    f'/api/recipes/{self.own_recipe}/{action}/',
+                    None
+                ),
+                (201, 204),
+                auth=True,
+                write=True
+            )
+
+    def perform(self, client, scenario, number):
+        """
+        Выполняет запрос сценария. Возвращает время в миллисекундах,
+        количество запросов к базе и признак ожидаемого ответа.
+        """
+        method, path, data = scenario.request(number)
+        with CaptureQueriesContext(connection) as queries:
+            pending = len(connection.run_on_commit)
+            started = time.perf_counter()
+            if data is None:
+                response = getattr(client, method)(path)
+            else:
+                response = getattr(client, method)(path, data, format='json')
+            if response.streaming:
+                b''.join(response.streaming_content)
+            if scenario.write:
+                self.run_on_commit(pending)
+            elapsed = (time.perf_counter() - started) * 1000
+        expected = scenario.expected
+        if isinstance(expected, tuple):
+            expected = expected[number % len(expected)]
+        return elapsed, len(queries), response.status_code == expected
+
+    def run_on_commit(self, pending):
+        """
+        Выполняет обработчики on_commit, добавленные после первых pending.
+
+        Транзакция сценария изменения не фиксируется, поэтому без этого
+        отложенная работа (производные изображений, MinHash-подписи,
+        версии справочников, журнал связей ингредиентов) не попала бы
+        в замер. Обработчики, добавленные другими обработчиками, тоже
+        выполняются.
+        """
+        while len(connection.run_on_commit) > pending:
+            callbacks = connection.run_on_commit[pending:]
+            del connection.run_on_commit[pending:]
+            for callback in callbacks:
+                callback[1]()
+
+    def remove_images(self, names):
+        """
+        Удаляет из хранилища изображения и их производные: откат
+        транзакции сценария не удаляет файлы.
+        """
+        for name in names:
+            default_storage.delete(name)
+            for derivative in IMAGE_DERIVATIVES:
+                default_storage.delete(derivative_name(name, derivative))
+
+    def measure(self, scenario, numbers):
+        client = self.client(scenario.auth)
+        try:
+            return [
+                self.perform(client, scenario, number) for number in numbers
+            ]
+        finally:
+            if not scenario.write:
+                connections.close_all()
+
+    def run(self, scenario, options):
+        warmup, count = options['warmup'], options['requests']
+        if scenario.write:
+            # Изменения откатываются, чтобы данные не менялись от запуска
+            # к запуску, обработчики on_commit выполняются в perform().
+            with transaction.atomic():
+                self.own_recipe = self.create_own_recipe()
+                samples = self.measure(scenario, range(warmup + count))
+                images = list(Recipes.objects.filter(
+                    id__gte=self.own_recipe
+                ).exclude(image='').values_list('image', flat=True))
+                transaction.set_rollback(True)
+            self.remove_images(images)
+            samples = samples[warmup:]
+            elapsed = sum(sample[0] for sample in samples) / 1000
+        else:
+            self.measure(scenario, range(warmup))
+            workers = max(1, options['concurrency'])
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                chunks = pool.map(
+                    lambda worker: self.measure(
+                        scenario, range(worker, count, workers)
+                    ),
+                    range(workers)
+                )
+                samples = [sample for chunk in chunks for sample in chunk]
+            elapsed = time.perf_counter() - started
+
+        timings = [sample[0] for sample in samples]
+        return {
+            'requests': len(samples),
+            'errors': sum(not sample[2] for sample in samples),
+            'p50': round(percentile(timings, 50), 3),
+            'p95': round(percentile(timings, 95), 3),
+            'p99': round(percentile(timings, 99), 3),
+            'throughput': round(len(samples) / elapsed, 2) if elapsed else 0,
+            'queries': round(statistics.mean(
+                sample[1] for sample in samples
+            ), 2),
+        }
+
+    def create_own_recipe(self):
+        """
+        Создает рецепт пользователя для сценариев изменения.
+        """
+        recipe = Recipes.objects.create(
+            author=self.user,
+            name='Рецепт для замера',
+            text='Рецепт для замера производительности.',
+            cooking_time=10,
+        )
+        RecipeIngredients.objects.bulk_create([
+            RecipeIngredients(recipe=recipe, ingredient_id=pk, amount=1)
+            for pk in Ingredients.objects.values_list('id', flat=True)[:3]
+        ])
+        return recipe.id
+
+    def report(self, name, result):
+        logger.info(
+            f'{name}: p50 {result["p50"]:.1f} мс, p95 {result["p95"]:.1f} мс, '
+            f'p99 {result["p99"]:.1f} мс, {result["throughput"]:.1f} запр/с, '
+            f'запросов к БД {result["queries"]:.1f}, '
+            f'ошибок {result["errors"]}'
+        )
+
+    def compare(self, results, baseline, threshold):
+        """
+        Возвращает описания регрессий: рост p95 больше чем на threshold,
+        рост числа запросов к базе или появление ошибок.
+        """
+        regressions = []
+        for name, result in results.items():
+            base = baseline.get(name)
+            if base is None:
+                continue
+            if result['p95'] > base['p95'] * (1 + threshold):
+                regressions.append(
+                    f'{name}: p95 {base["p95"]:.1f} -> {result["p95"]:.1f} мс'
+                )
+            if result['queries'] > base['queries'] + 0.5:
+                regressions.append(
+                    f'{name}: запросов к БД {base["queries"]} -> '
+                    f'{result["queries"]}'
+                )
+            if result['errors'] > base['errors']:
+                regressions.append(
+                    f'{name}: ошибок {base["errors"]} -> {result["errors"]}'
+                )
+        return regressions
@@ -0,0 +1,119 @@
+import logging
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F
+from recipes.models import Favorites, Recipes
+from users.models import User
+from recipes.ranking import refresh_ranking
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает стоимость выдачи популярных рецептов из рейтинга '
+        'и из агрегации по избранному и спискам покупок на лету.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Количество замеров каждого варианта.'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=6,
+            help='Размер страницы популярных рецептов.'
+        )
+        parser.add_argument(
+            '--activity',
+            type=int,
+            default=1000,
+            help='Количество новых записей избранного, которые учитывает '
+                 'каждый замер пересчета рейтинга.'
+        )
+
+    def measure(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings), max(timings)
+
+    def add_activity(self, count):
+        """
+        Добавляет count случайных записей избранного, которых еще нет.
+        """
+        user_ids = list(User.objects.values_list('id', flat=True)[:1000])
+        recipe_ids = list(Recipes.objects.values_list('id', flat=True))
+        if not user_ids or not recipe_ids:
+            return
+        pairs = {
+            (random.choice(user_ids), random.choice(recipe_ids))
+            for _ in range(count)
+        }
+        Favorites.objects.bulk_create(
+            [Favorites(user_id=user_id, recipe_id=recipe_id)
+             for user_id, recipe_id in pairs],
+            batch_size=1000,
+            ignore_conflicts=True
+        )
+
+    def measure_refresh(self, repeat, activity):
+        """
+        Измеряет пересчет рейтинга после появления activity новых
+        записей избранного.
+
+        Каждый замер выполняется в транзакции, которая затем
+        откатывается, поэтому позиция рейтинга и данные не меняются.
+        Пересчет накопленных ранее записей и добавление новых в замер
+        не входят.
+        """
+        timings = []
+        for _ in range(repeat):
+            with transaction.atomic():
+                refresh_ranking()
+                self.add_activity(activity)
+                started = time.perf_counter()
+                refresh_ranking()
+                timings.append((time.perf_counter() - started) * 1000)
+                transaction.set_rollback(True)
+        return statistics.median(timings), max(timings)
+
+    def handle(self, *args, **options):
+        limit = options['limit']
+
+        def live():
+            list(Recipes.objects.annotate(
+                favorites_total=Count('favorites', distinct=True),
+                shoplist_total=Count('shoplist', distinct=True),
+            ).order_by(
+                (F('favorites_total') + F('shoplist_total')).desc(), '-id'
+            ).values_list('id', flat=True)[:limit])
+
+        def ranked():
+            list(Recipes.objects.order_by(
+                F('ranking__score').desc(nulls_last=True), '-id'
+            ).values_list('id', flat=True)[:limit])
+
+        measurements = [
+            (title, self.measure(func, options['repeat']))
+            for title, func in (('агрегация на лету', live),
+                                ('рейтинг', ranked))
+        ]
+        measurements.append((
+            f'пересчет рейтинга ({options["activity"]} новых записей)',
+            self.measure_refresh(options['repeat'], options['activity'])
+        ))
+        for title, (median, worst) in measurements:
+            logger.info(
+                f'{title}: медиана {median:.2f} мс, максимум {worst:.2f} мс'
+            )
@@ -0,0 +1,92 @@
+import logging
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from recipes.minhash import similar_recipes
+from recipes.models import RecipeIngredients
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает выдачу похожих рецептов через LSH с точным расчетом '
+        'коэффициента Жаккара: полноту среди k лучших и время ответа.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sample',
+            type=int,
+            default=100,
+            help='Количество случайных рецептов для проверки.'
+        )
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=6,
+            help='Сколько похожих рецептов сравнивать.'
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=0.5,
+            help='Учитывать только соседей с точным сходством не ниже порога.'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Начальное значение генератора случайных чисел.'
+        )
+
+    def handle(self, *args, **options):
+        ingredients = {}
+        for recipe_id, ingredient_id in RecipeIngredients.objects.values_list(
+            'recipe_id', 'ingredient_id'
+        ).iterator():
+            ingredients.setdefault(recipe_id, set()).add(ingredient_id)
+        recipe_ids = sorted(ingredients)
+        sample = random.Random(options['seed']).sample(
+            recipe_ids, min(options['sample'], len(recipe_ids))
+        )
+
+        top, threshold = options['top'], options['threshold']
+        found = expected = 0
+        exact_timings, lsh_timings = [], []
+        for recipe_id in sample:
+            started = time.perf_counter()
+            first = ingredients[recipe_id]
+            exact = sorted(
+                ((other_id, len(first & other) / len(first | other))
+                 for other_id, other in ingredients.items()
+                 if other_id != recipe_id),
+                key=lambda item: (-item[1], -item[0])
+            )
+            exact_timings.append((time.perf_counter() - started) * 1000)
+
+            started = time.perf_counter()
+            approximate = similar_recipes(recipe_id)[:top]
+            lsh_timings.append((time.perf_counter() - started) * 1000)
+
+            relevant = {
+                other_id for other_id, similarity in exact[:top]
+                if similarity >= threshold
+            }
+            expected += len(relevant)
+            found += len(relevant & {other_id for other_id, _ in approximate})
+
+        recall = found / expected if expected else 1.0
+        logger.info(
+            f'Рецептов: {len(recipe_ids)}, проверено: {len(sample)}, '
+            f'полнота top-{top} при сходстве от {threshold}: {recall:.3f}'
+        )
+        for title, timings in (('точный расчет', exact_timings),
+                               ('LSH', lsh_timings)):
+            if timings:
+                logger.info(
+                    f'{title}: медиана {statistics.median(timings):.2f} мс, '
+                    f'максимум {max(timings):.2f} мс'
+                )
@@ -0,0 +1,60 @@
+import logging
+import os
+import posixpath
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import connections
+from recipes.images import generate_derivatives
+from recipes.models import Recipes
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Создает миниатюры и WebP-версии для изображений рецептов '
+        'в пуле процессов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='Количество процессов.'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Пересоздать уже существующие производные изображения.'
+        )
+
+    def handle(self, *args, **options):
+        directory = Recipes._meta.get_field('image').upload_to.rstrip('/')
+        _, files = default_storage.listdir(directory)
+        names = [posixpath.join(directory, name) for name in sorted(files)]
+        logger.info(f'Изображений для обработки: {len(names)}')
+
+        connections.close_all()
+        started = time.monotonic()
+        created = failed = 0
+        task = partial(generate_derivatives, force=options['force'])
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            futures = {pool.submit(task, name): name for name in names}
+            for done, future in enumerate(as_completed(futures), start=1):
+                try:
+                    created += future.result()
+                except (OSError, ValueError) as error:
+                    failed += 1
+                    logger.warning(f'{futures[future]}: {error}')
+                if done % 100 == 0:
+                    logger.info(f'Обработано {done} из {len(names)}')
+
+        logger.info(
+            f'Создано файлов: {created}, ошибок: {failed}, '
+            f'время: {time.monotonic() - started:.1f} с'
+        )
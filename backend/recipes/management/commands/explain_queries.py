@@ -0,0 +1,108 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import BooleanField, Count, F, Value
+from recipes.feed import feed_queryset
+from recipes.models import (Ingredients, Recipes, RecipeIngredients,
+                            ShoplistIngredients, TimeTag)
+from users.models import User
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Выводит планы выполнения основных запросов API на текущих данных: '
+        'EXPLAIN (ANALYZE, BUFFERS) на PostgreSQL, EXPLAIN QUERY PLAN '
+        'на SQLite, и время выполнения каждого запроса.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=int,
+            help='id пользователя, от имени которого строятся запросы. '
+                 'По умолчанию — пользователь с наибольшим числом подписок.'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=6,
+            help='Размер страницы.'
+        )
+
+    def get_user(self, user_id):
+        if user_id is not None:
+            try:
+                return User.objects.get(id=user_id)
+            except User.DoesNotExist:
+                raise CommandError(f'Пользователь {user_id} не найден')
+        user = User.objects.annotate(
+            subscriptions=Count('follower')
+        ).order_by('-subscriptions', 'id').first()
+        if user is None:
+            raise CommandError('В базе данных нет пользователей')
+        return user
+
+    def querysets(self, user, limit):
+        """
+        Возвращает пары (название, queryset) в том виде, в котором их
+        строят представления API.
+        """
+        recipes = Recipes.objects.with_user_flags(user)
+        tag = TimeTag.objects.order_by('id').first()
+        ingredient = Ingredients.objects.order_by('id').first()
+        prefix = ingredient.name[:2] if ingredient else 'а'
+        recipe_ids = list(recipes.values_list('id', flat=True)[:limit])
+        yield 'recipes: список', recipes[:limit]
+        yield 'recipes: is_favorited', recipes.filter(
+            is_favorited=True
+        )[:limit]
+        yield 'recipes: is_in_shopping_cart', recipes.filter(
+            is_in_shopping_cart=True
+        )[:limit]
+        if tag is not None:
+            yield 'recipes: tags', recipes.filter(
+                tags__slug=tag.slug
+            ).distinct()[:limit]
+        yield 'recipes: author', recipes.filter(author=user)[:limit]
+        yield 'recipes: ordering=popular', recipes.order_by(
+            F('ranking__score').desc(nulls_last=True), '-id'
+        )[:limit]
+        yield 'recipes: ингредиенты страницы', (
+            RecipeIngredients.objects.filter(
+                recipe_id__in=recipe_ids
+            ).select_related('ingredient')
+        )
+        yield 'recipes: feed', feed_queryset(user).order_by('-id')[:limit]
+        yield 'ingredients: name', Ingredients.objects.filter(
+            name__startswith=prefix
+        )
+        yield 'users: subscriptions', User.objects.filter(
+            following__user=user
+        ).annotate(
+            is_subscribed=Value(True, output_field=BooleanField())
+        )[:limit]
+        yield 'recipes: download_shopping_cart', (
+            ShoplistIngredients.objects.filter(user=user).values_list(
+                'ingredient__name', 'amount', 'ingredient__measurement_unit'
+            ).order_by('ingredient__name', 'ingredient__measurement_unit')
+        )
+
+    def handle(self, *args, **options):
+        user = self.get_user(options['user'])
+        postgresql = connection.vendor == 'postgresql'
+        logger.info(f'Запросы строятся от имени пользователя {user.id}')
+        for title, queryset in self.querysets(user, options['limit']):
+            if postgresql:
+                plan = queryset.explain(analyze=True, buffers=True)
+            else:
+                plan = queryset.explain()
+            started = time.perf_counter()
+            rows = len(list(queryset))
+            elapsed = (time.perf_counter() - started) * 1000
+            logger.info(
+                f'{title}: строк {rows}, время {elapsed:.2f} мс\n{plan}\n'
+            )
@@ -0,0 +1,97 @@
+import json
+import logging
+import posixpath
+import shutil
+import time
+from pathlib import Path
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from recipes.models import Recipes
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает рецепты в NDJSON: автор, временные метки и ингредиенты '
+        'по естественным ключам, изображения — отдельными файлами.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл NDJSON для выгрузки.')
+        parser.add_argument(
+            '--images-dir',
+            help='Каталог для изображений, по умолчанию <path>_images.'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        images_dir = Path(
+            options['images_dir'] or f'{path.with_suffix("")}_images'
+        )
+        images_dir.mkdir(parents=True, exist_ok=True)
+
+        started = time.monotonic()
+        exported = 0
+        with open(path, 'w', encoding='utf-8') as file:
+            for recipe in self.iter_recipes(options['batch_size']):
+                file.write(json.dumps(
+                    self.serialize(recipe, images_dir), ensure_ascii=False
+                ))
+                file.write('\n')
+                exported += 1
+                if exported % options['batch_size'] == 0:
+                    logger.info(f'Выгружено рецептов: {exported}')
+
+        elapsed = time.monotonic() - started
+        logger.info(
+            f'Выгрузка завершена! Рецептов: {exported}, '
+            f'время: {elapsed:.2f} с '
+            f'({exported / elapsed if elapsed else 0:.0f} рецептов/с)'
+        )
+
+    def iter_recipes(self, batch_size):
+        """
+        Перебирает рецепты пачками по возрастанию id со всеми
+        связанными объектами.
+        """
+        last_id = 0
+        while True:
+            batch = list(
+                Recipes.objects.with_related().filter(
+                    id__gt=last_id
+                ).order_by('id')[:batch_size]
+            )
+            if not batch:
+                return
+            yield from batch
+            last_id = batch[-1].id
+
+    def serialize(self, recipe, images_dir):
+        """
+        Возвращает рецепт в виде словаря и копирует его изображение.
+        """
+        image = None
+        if recipe.image:
+            image = posixpath.basename(recipe.image.name)
+            with default_storage.open(recipe.image.name, 'rb') as source:
+                with open(images_dir / image, 'wb') as target:
+                    shutil.copyfileobj(source, target)
+        return {
+            'name': recipe.name,
+            'author': recipe.author.username if recipe.author else None,
+            'text': recipe.text,
+            'cooking_time': recipe.cooking_time,
+            'image': image,
+            'tags': [tag.slug for tag in recipe.tags.all()],
+            'ingredients': [
+                {
+                    'name': row.ingredient.name,
+                    'measurement_unit': row.ingredient.measurement_unit,
+                    'amount': row.amount,
+                }
+                for row in recipe.recipe_ingredients.all()
+            ],
+        }
@@ -0,0 +1,190 @@
+import json
+import logging
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F
+from recipes.catalog import (INGREDIENTS_CATALOG, RECIPE_INGREDIENTS_CATALOG,
+                             bump_catalog_version)
+from recipes.feed import fan_out_recipes
+from recipes.management.commands.ingrs_loader import batches
+from recipes.minhash import store_signatures
+from recipes.models import Ingredients, RecipeIngredients, Recipes, TimeTag
+from users.models import User
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает рецепты из NDJSON, созданного командой export_recipes, '
+        'пачками в отдельных транзакциях.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл NDJSON с рецептами.')
+        parser.add_argument(
+            '--images-dir',
+            help='Каталог с изображениями, по умолчанию <path>_images.'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        self.images_dir = Path(
+            options['images_dir'] or f'{path.with_suffix("")}_images'
+        )
+        self.tags = dict(TimeTag.objects.values_list('slug', 'id'))
+        self.ingredients = {
+            (name, unit): pk for pk, name, unit in
+            Ingredients.objects.values_list('id', 'name', 'measurement_unit')
+        }
+        self.ingredients_created = False
+
+        started = time.monotonic()
+        imported = skipped = 0
+        with open(path, 'r', encoding='utf-8') as file:
+            items = (json.loads(line) for line in file if line.strip())
+            for batch in batches(items, options['batch_size']):
+                with transaction.atomic():
+                    created = self.import_batch(batch)
+                imported += created
+                skipped += len(batch) - created
+                elapsed = time.monotonic() - started
+                logger.info(
+                    f'Загружено рецептов: {imported}, пропущено: {skipped} '
+                    f'({imported / elapsed if elapsed else 0:.0f} рецептов/с)'
+                )
+
+        if self.ingredients_created:
+            bump_catalog_version(INGREDIENTS_CATALOG)
+        if imported:
+            bump_catalog_version(RECIPE_INGREDIENTS_CATALOG)
+        elapsed = time.monotonic() - started
+        logger.info(
+            f'Загрузка завершена! Рецептов: {imported}, '
+            f'пропущено: {skipped}, время: {elapsed:.2f} с '
+            f'({imported / elapsed if elapsed else 0:.0f} рецептов/с)'
+        )
+
+    def resolve_ingredients(self, batch):
+        """
+        Дополняет словарь ингредиентов недостающими позициями пачки.
+        """
+        missing = {
+            (item['name'], item['measurement_unit'])
+            for recipe in batch for item in recipe['ingredients']
+        } - self.ingredients.keys()
+        if not missing:
+            return
+        Ingredients.objects.bulk_create(
+            [Ingredients(name=name, measurement_unit=unit)
+             for name, unit in missing],
+            ignore_conflicts=True
+        )
+        for pk, name, unit in Ingredients.objects.filter(
+            name__in={name for name, _ in missing}
+        ).values_list('id', 'name', 'measurement_unit'):
+            self.ingredients[(name, unit)] = pk
+        self.ingredients_created = True
+
+    def import_batch(self, batch):
+        """
+        Создает рецепты пачки, их связи, MinHash-подписи и записи в лентах
+        подписчиков.
+
+        Рецепты, которые уже есть у автора, и рецепты без автора или
+        с неизвестным автором пропускаются.
+        """
+        authors = dict(User.objects.filter(
+            username__in={item['author'] for item in batch if item['author']}
+        ).values_list('username', 'id'))
+        unknown_tags = {
+            slug for item in batch for slug in item['tags']
+        } - self.tags.keys()
+        if unknown_tags:
+            raise CommandError(
+                f'Неизвестные временные метки: {", ".join(unknown_tags)}'
+            )
+        self.resolve_ingredients(batch)
+
+        existing = set(Recipes.objects.filter(
+            author_id__in=authors.values(),
+            name__in={item['name'] for item in batch}
+        ).values_list('author_id', 'name'))
+        new = {}
+        for item in batch:
+            author_id = authors.get(item['author'])
+            if author_id is None:
+                continue
+            key = (author_id, item['name'])
+            if key in existing or key in new:
+                continue
+            new[key] = item
+        if not new:
+            return 0
+
+        recipes = []
+        for (author_id, name), item in new.items():
+            recipe = Recipes(
+                author_id=author_id,
+                name=name,
+                text=item['text'],
+                cooking_time=item['cooking_time'],
+            )
+            if item['image']:
+                with open(self.images_dir / item['image'], 'rb') as image:
+                    recipe.image.save(item['image'], File(image), save=False)
+            recipes.append(recipe)
+        Recipes.objects.bulk_create(recipes, batch_size=len(recipes))
+
+        ids = {
+            (author_id, name): pk for pk, author_id, name in
+            Recipes.objects.filter(
+                author_id__in={author_id for author_id, _ in new},
+                name__in={name for _, name in new}
+            ).values_list('id', 'author_id', 'name')
+        }
+
+        recipe_tags = Recipes.tags.through
+        recipe_tags.objects.bulk_create([
+            recipe_tags(recipes_id=ids[key], timetag_id=self.tags[slug])
+            for key, item in new.items() for slug in set(item['tags'])
+        ])
+        RecipeIngredients.objects.bulk_create([
+            RecipeIngredients(
+                recipe_id=ids[key],
+                ingredient_id=self.ingredients[
+                    (ingredient['name'], ingredient['measurement_unit'])
+                ],
+                amount=ingredient['amount']
+            )
+            for key, item in new.items() for ingredient in item['ingredients']
+        ])
+        store_signatures({
+            ids[key]: {
+                self.ingredients[
+                    (ingredient['name'], ingredient['measurement_unit'])
+                ]
+                for ingredient in item['ingredients']
+            }
+            for key, item in new.items()
+        })
+
+        recipes_by_author = defaultdict(list)
+        for key in new:
+            recipes_by_author[key[0]].append(ids[key])
+        fan_out_recipes(recipes_by_author)
+
+        authors_by_count = defaultdict(list)
+        for author_id, recipe_ids in recipes_by_author.items():
+            authors_by_count[len(recipe_ids)].append(author_id)
+        for count, author_ids in authors_by_count.items():
+            User.objects.filter(id__in=author_ids).update(
+                recipes_count=F('recipes_count') + count
+            )
+        return len(new)
@@ -1,23 +1,189 @@
 import csv
+import io
+import json
 import logging
+import time
+from itertools import islice
+from pathlib import Path
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from recipes.catalog import INGREDIENTS_CATALOG, bump_catalog_version
 from recipes.models import Ingredients
 
 logger = logging.getLogger(__name__)
 
+FORMATS = {
+    '.csv': 'csv',
+    '.json': 'json',
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+}
+CHUNK_SIZE = 64 * 1024
+
+
+def read_csv(file):
+    """
+    Читает пары (название, единица измерения) из CSV без заголовка.
+    """
+    for row in csv.reader(file, delimiter=','):
+        if len(row) >= 2:
+            yield row[0], row[1]
+
+
+def read_ndjson(file):
+    """
+    Читает ингредиенты из файла с JSON-объектом на каждой строке.
+    """
+    for line in file:
+        if line.strip():
+            item = json.loads(line)
+            yield item['name'], item['measurement_unit']
+
+
+def read_json(file):
+    """
+    Читает ингредиенты из JSON-массива объектов по частям, не загружая
+    весь файл в память.
+    """
+    decoder = json.JSONDecoder()
+    buffer = file.read(CHUNK_SIZE).lstrip()
+    if not buffer.startswith('['):
+        raise CommandError('Ожидается JSON-массив ингредиентов')
+    buffer = buffer[1:]
+    while True:
+        buffer = buffer.lstrip().lstrip(',').lstrip()
+        if buffer.startswith(']'):
+            return
+        try:
+            item, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            chunk = file.read(CHUNK_SIZE)
+            if not chunk:
+                raise CommandError('Неожиданный конец JSON-файла')
+            buffer += chunk
+            continue
+        yield item['name'], item['measurement_unit']
+        buffer = buffer[end:]
+
+
+READERS = {
+    'csv': read_csv,
+    'json': read_json,
+    'ndjson': read_ndjson,
+}
+
+
+def batches(rows, size):
+    """
+    Делит поток строк на списки длиной не более size.
+    """
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
 
 class Command(BaseCommand):
+    help = (
+        'Загружает ингредиенты из CSV, JSON или NDJSON. Уже существующие '
+        'ингредиенты пропускаются, поэтому команду можно запускать повторно.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            default='data/ingredients.csv',
+            help='Путь к файлу с ингредиентами.'
+        )
+        parser.add_argument(
+            '--format',
+            choices=sorted(READERS),
+            help='Формат файла, по умолчанию определяется по расширению.'
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--copy',
+            action='store_true',
+            help='Загрузить через COPY во временную таблицу (PostgreSQL).'
+        )
+
     def handle(self, *args, **options):
-        with open('data/ingredients.csv', 'r', encoding='utf-8') as file:
-            reader = csv.reader(file, delimiter=',')
-            ingredients_to_create = []
-
-            for row in reader:
-                name, unit = row
-                if name:
-                    ingredient = Ingredients(name=name, measurement_unit=unit)
-                    ingredients_to_create.append(ingredient)
-
-            Ingredients.objects.bulk_create(ingredients_to_create)
-            logger.info('Загрузка ингредиентов завершена!')
+        path = Path(options['path'])
+        file_format = options['format'] or FORMATS.get(path.suffix.lower())
+        if file_format is None:
+            raise CommandError(f'Неизвестный формат файла: {path}')
+        if options['copy'] and connection.vendor != 'postgresql':
+            raise CommandError('Параметр --copy доступен только в PostgreSQL')
+
+        started = time.monotonic()
+        before = Ingredients.objects.count()
+        with open(path, 'r', encoding='utf-8') as file:
+            rows = (
+                (name.strip(), unit.strip())
+                for name, unit in READERS[file_format](file)
+                if name.strip()
+            )
+            with transaction.atomic():
+                if options['copy']:
+                    read = self.copy_rows(rows, options['batch_size'])
+                else:
+                    read = self.insert_rows(rows, options['batch_size'])
+                bump_catalog_version(INGREDIENTS_CATALOG)
+
+        created = Ingredients.objects.count() - before
+        elapsed = time.monotonic() - started
+        logger.info(
+            f'Загрузка ингредиентов завершена! Прочитано: {read}, '
+            f'добавлено: {created}, время: {elapsed:.2f} с '
+            f'({read / elapsed if elapsed else 0:.0f} строк/с)'
+        )
+
+    def insert_rows(self, rows, batch_size):
+        """
+        Вставляет ингредиенты пачками, пропуская уже существующие.
+        """
+        read = 0
+        for batch in batches(rows, batch_size):
+            Ingredients.objects.bulk_create(
+                [Ingredients(name=name, measurement_unit=unit)
+                 for name, unit in batch],
+                ignore_conflicts=True
+            )
+            read += len(batch)
+            logger.info(f'Обработано строк: {read}')
+        return read
+
+    def copy_rows(self, rows, batch_size):
+        """
+        Загружает ингредиенты командой COPY во временную таблицу и
+        переносит новые строки в основную одним INSERT ... ON CONFLICT.
+        """
+        table = Ingredients._meta.db_table
+        read = 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TEMPORARY TABLE ingredients_staging '
+                '(name text, measurement_unit text) ON COMMIT DROP'
+            )
+            for batch in batches(rows, batch_size):
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(batch)
+                buffer.seek(0)
+                cursor.copy_expert(
+                    'COPY ingredients_staging (name, measurement_unit) '
+                    'FROM STDIN WITH (FORMAT csv)',
+                    buffer
+                )
+                read += len(batch)
+                logger.info(f'Скопировано строк: {read}')
+            cursor.execute(
+                f'INSERT INTO {table} (name, measurement_unit) '
+                f'SELECT DISTINCT name, measurement_unit '
+                f'FROM ingredients_staging '
+                f'ON CONFLICT (name, measurement_unit) DO NOTHING'
+            )
+        return read
@@ -0,0 +1,25 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from recipes.feed import rebuild_feeds
+from recipes.models import FeedEntry
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересобирает ленты подписок, например после массовой загрузки '
+        'рецептов или изменения FEED_FANOUT_LIMIT.'
+    )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        with transaction.atomic():
+            rebuild_feeds()
+        logger.info(
+            f'Ленты пересобраны, записей: {FeedEntry.objects.count()}, '
+            f'время: {time.monotonic() - started:.2f} с'
+        )
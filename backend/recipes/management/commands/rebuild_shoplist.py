@@ -0,0 +1,39 @@
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+from recipes.shoplist import (live_shoplist_totals, rebuild_shoplist_totals,
+                              stored_shoplist_totals)
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересобирает суммы ингредиентов списков покупок и сверяет их '
+        'с соединением RecipeIngredients и Shoplist.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только сверить таблицу, не пересобирая ее.'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if not options['check']:
+            rebuild_shoplist_totals(batch_size=options['batch_size'])
+            logger.info('Суммы списков покупок пересобраны.')
+
+        live = live_shoplist_totals()
+        stored = stored_shoplist_totals()
+        mismatched = {
+            key for key in live.keys() | stored.keys()
+            if live.get(key) != stored.get(key)
+        }
+        if mismatched:
+            raise CommandError(
+                f'Расхождений в списках покупок: {len(mismatched)}'
+            )
+        logger.info(f'Списки покупок сверены, строк: {len(stored)}.')
@@ -0,0 +1,45 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from recipes.minhash import ingredients_of, store_signatures
+from recipes.models import Recipes
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает MinHash-подписи и LSH-корзины всех рецептов '
+        'пачками.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество рецептов в одной транзакции.'
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        done = last_id = 0
+        while True:
+            batch = list(Recipes.objects.filter(
+                id__gt=last_id
+            ).order_by('id').values_list('id', flat=True)[
+                :options['batch_size']
+            ])
+            if not batch:
+                break
+            with transaction.atomic():
+                store_signatures(ingredients_of(batch))
+            done += len(batch)
+            last_id = batch[-1]
+            elapsed = time.monotonic() - started
+            logger.info(
+                f'Обработано рецептов: {done} '
+                f'({done / elapsed if elapsed else 0:.0f} рецептов/с)'
+            )
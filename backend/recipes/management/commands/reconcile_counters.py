@@ -0,0 +1,24 @@
+import logging
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from recipes.counters import COUNTERS, reconcile_counter
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет счетчики избранного, списков покупок, рецептов '
+        'и подписчиков с фактическими данными и исправляет расхождения.'
+    )
+
+    def handle(self, *args, **options):
+        for model, field, related_model, foreign_key in COUNTERS:
+            with transaction.atomic():
+                fixed = reconcile_counter(
+                    model, field, related_model, foreign_key
+                )
+            logger.info(
+                f'{model._meta.model_name}.{field}: исправлено строк {fixed}'
+            )
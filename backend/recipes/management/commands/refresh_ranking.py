@@ -0,0 +1,22 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from recipes.ranking import refresh_ranking
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Добавляет в рейтинг популярности рецептов новые записи избранного '
+        'и списков покупок. Рассчитан на запуск по расписанию.'
+    )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        updated = refresh_ranking()
+        logger.info(
+            f'Рейтинг обновлен, рецептов: {updated}, '
+            f'время: {time.monotonic() - started:.3f} с'
+        )
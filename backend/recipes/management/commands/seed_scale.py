@@ -0,0 +1,372 @@
+import csv
+import io
+import logging
+import random
+import time
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from PIL import Image
+from recipes.catalog import (RECIPE_INGREDIENTS_CATALOG, TAGS_CATALOG,
+                             bump_catalog_version)
+from recipes.counters import COUNTERS, reconcile_counter
+from recipes.feed import rebuild_feeds
+from recipes.images import generate_derivatives
+from recipes.models import (Favorites, Ingredients, RecipeIngredients,
+                            Recipes, Shoplist, TimeTag)
+from recipes.ranking import refresh_ranking
+from recipes.shoplist import rebuild_shoplist_totals
+from users.models import Subscribe, User
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'lunch'),
+    ('Ужин', '#8775D2', 'dinner'),
+)
+DISHES = (
+    'Суп', 'Салат', 'Рагу', 'Запеканка', 'Паста', 'Омлет', 'Каша',
+    'Пирог', 'Плов', 'Котлеты', 'Блины', 'Смузи', 'Гуляш', 'Ризотто',
+)
+MODIFIERS = (
+    'домашний', 'быстрый', 'острый', 'летний', 'праздничный',
+    'постный', 'сытный', 'легкий', 'по-деревенски', 'бабушкин',
+)
+PLACEHOLDER_COLORS = (
+    '#E26C2D', '#49B64E', '#8775D2', '#F2C94C',
+    '#56CCF2', '#EB5757', '#6FCF97', '#BB6BD9',
+)
+
+
+def zipf_cum_weights(size, exponent):
+    """
+    Возвращает накопленные веса распределения Ципфа для size элементов.
+    """
+    return list(accumulate(
+        1 / rank ** exponent for rank in range(1, size + 1)
+    ))
+
+
+class Command(BaseCommand):
+    help = (
+        'Создает воспроизводимый синтетический набор данных: пользователей, '
+        'рецепты, избранное, списки покупок и подписки с распределением '
+        'Ципфа. Служебные таблицы (счетчики, суммы списков покупок, ленты, '
+        'рейтинг, подписи) пересобираются в конце.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument(
+            '--favorites',
+            type=float,
+            default=20,
+            help='Среднее количество рецептов в избранном пользователя.'
+        )
+        parser.add_argument(
+            '--carts',
+            type=float,
+            default=3,
+            help='Среднее количество рецептов в корзине пользователя.'
+        )
+        parser.add_argument(
+            '--subscriptions',
+            type=float,
+            default=10,
+            help='Среднее количество подписок пользователя.'
+        )
+        parser.add_argument(
+            '--exponent',
+            type=float,
+            default=1.1,
+            help='Показатель распределения Ципфа.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--password',
+            default='seed-password',
+            help='Пароль всех созданных пользователей.'
+        )
+        parser.add_argument(
+            '--copy',
+            action='store_true',
+            help='Загружать строки командой COPY (PostgreSQL).'
+        )
+        parser.add_argument(
+            '--skip-derived',
+            action='store_true',
+            help='Не пересобирать служебные таблицы.'
+        )
+
+    def handle(self, *args, **options):
+        if options['copy'] and connection.vendor != 'postgresql':
+            raise CommandError('Параметр --copy доступен только в PostgreSQL')
+        self.random = random.Random(options['seed'])
+        self.copy = options['copy']
+        self.batch_size = options['batch_size']
+        self.exponent = options['exponent']
+        self.prefix = f'seed{options["seed"]}'
+        seeded = User.objects.filter(username__startswith=f'{self.prefix}_')
+        if seeded.exists():
+            raise CommandError(
+                f'Набор данных с seed={options["seed"]} уже создан'
+            )
+
+        started = time.monotonic()
+        ingredient_ids, tag_ids = self.prepare_catalogs()
+        images = self.create_placeholders()
+        user_ids = self.create_users(options['users'], options['password'])
+        recipe_ids = self.create_recipes(
+            options['recipes'], user_ids, ingredient_ids, tag_ids, images
+        )
+        self.create_links(
+            Favorites, 'user_id', 'recipe_id',
+            user_ids, recipe_ids, options['favorites']
+        )
+        self.create_links(
+            Shoplist, 'user_id', 'recipe_id',
+            user_ids, recipe_ids, options['carts']
+        )
+        self.create_links(
+            Subscribe, 'user_id', 'author_id',
+            user_ids, user_ids, options['subscriptions'], exclude_self=True
+        )
+        bump_catalog_version(RECIPE_INGREDIENTS_CATALOG)
+        if not options['skip_derived']:
+            self.rebuild_derived()
+        logger.info(
+            f'Набор данных создан за {time.monotonic() - started:.1f} с'
+        )
+
+    def insert(self, model, fields, rows):
+        """
+        Вставляет строки в таблицу model: через bulk_create или COPY.
+
+        fields — имена атрибутов модели (для внешних ключей — с _id).
+        """
+        if not rows:
+            return
+        if not self.copy:
+            model.objects.bulk_create(
+                [model(**dict(zip(fields, row))) for row in rows],
+                batch_size=self.batch_size
+            )
+            return
+        columns = {
+            field.attname: field.column
+            for field in model._meta.concrete_fields
+        }
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {model._meta.db_table} '
+                f'({", ".join(columns[field] for field in fields)}) '
+                f'FROM STDIN WITH (FORMAT csv)',
+                buffer
+            )
+
+    def new_ids(self, model, last_id):
+        """
+        Возвращает id строк model, добавленных после last_id, по порядку.
+        """
+        return list(model.objects.filter(id__gt=last_id).order_by(
+            'id'
+        ).values_list('id', flat=True))
+
+    def last_id(self, model):
+        return model.objects.aggregate(last=Max('id'))['last'] or 0
+
+    def prepare_catalogs(self):
+        """
+        Загружает ингредиенты из data/ingredients.csv и создает временные
+        метки, если справочники пусты.
+        """
+        if not Ingredients.objects.exists():
+            call_command('ingrs_loader')
+        if not TimeTag.objects.exists():
+            TimeTag.objects.bulk_create([
+                TimeTag(name=name, color=color, slug=slug)
+                for name, color, slug in DEFAULT_TAGS
+            ])
+            bump_catalog_version(TAGS_CATALOG)
+        ingredient_ids = list(
+            Ingredients.objects.order_by('id').values_list('id', flat=True)
+        )
+        tag_ids = list(
+            TimeTag.objects.order_by('id').values_list('id', flat=True)
+        )
+        return ingredient_ids, tag_ids
+
+    def create_placeholders(self):
+        """
+        Сохраняет маленькие одноцветные изображения, общие для всех
+        рецептов набора.
+        """
+        directory = Recipes._meta.get_field('image').upload_to.rstrip('/')
+        names = []
+        for number, color in enumerate(PLACEHOLDER_COLORS):
+            name = f'{directory}/{self.prefix}_placeholder_{number}.png'
+            if not default_storage.exists(name):
+                buffer = io.BytesIO()
+                Image.new('RGB', (8, 8), color).save(buffer, 'PNG')
+                name = default_storage.save(
+                    name, ContentFile(buffer.getvalue())
+                )
+            generate_derivatives(name)
+            names.append(name)
+        return names
+
+    def create_users(self, count, password):
+        last_id = self.last_id(User)
+        password = make_password(password)
+        joined = timezone.now()
+        for start in range(0, count, self.batch_size):
+            with transaction.atomic():
+                User.objects.bulk_create([
+                    User(
+                        username=f'{self.prefix}_user_{number}',
+                        email=f'{self.prefix}_user_{number}@example.com',
+                        first_name=f'Имя{number}',
+                        last_name=f'Фамилия{number}',
+                        password=password,
+                        date_joined=joined,
+                    )
+                    for number in range(
+                        start, min(start + self.batch_size, count)
+                    )
+                ])
+        user_ids = self.new_ids(User, last_id)
+        logger.info(f'Пользователей: {len(user_ids)}')
+        return user_ids
+
+    def create_recipes(self, count, user_ids, ingredient_ids, tag_ids,
+                       images):
+        """
+        Создает рецепты с ингредиентами и временными метками.
+
+        Авторы и ингредиенты выбираются по распределению Ципфа:
+        немногие авторы пишут большую часть рецептов, а небольшая
+        часть ингредиентов встречается почти везде.
+        """
+        rnd = self.random
+        authors = rnd.sample(user_ids, len(user_ids))
+        author_weights = zipf_cum_weights(len(authors), self.exponent)
+        ingredients = rnd.sample(ingredient_ids, len(ingredient_ids))
+        ingredient_weights = zipf_cum_weights(
+            len(ingredients), self.exponent
+        )
+        recipe_tags = Recipes.tags.through
+        recipe_ids = []
+        started = time.monotonic()
+        for start in range(0, count, self.batch_size):
+            numbers = range(start, min(start + self.batch_size, count))
+            last_id = self.last_id(Recipes)
+            with transaction.atomic():
+                self.insert(
+                    Recipes,
+                    ('author_id', 'name', 'text', 'cooking_time', 'image',
+                     'favorites_count', 'in_carts_count'),
+                    [(
+                        rnd.choices(authors, cum_weights=author_weights)[0],
+                        f'{rnd.choice(DISHES)} {rnd.choice(MODIFIERS)} '
+                        f'№{number}',
+                        'Смешайте ингредиенты и готовьте до готовности.',
+                        max(1, int(rnd.lognormvariate(3.3, 0.6))),
+                        images[number % len(images)],
+                        0,
+                        0,
+                    ) for number in numbers]
+                )
+                batch_ids = self.new_ids(Recipes, last_id)
+                recipe_rows, tag_rows = [], []
+                for recipe_id in batch_ids:
+                    size = min(max(2, int(rnd.gauss(8, 3))), 25)
+                    chosen = set(rnd.choices(
+                        ingredients, cum_weights=ingredient_weights, k=size
+                    ))
+                    recipe_rows.extend(
+                        (recipe_id, ingredient_id, rnd.randint(1, 500))
+                        for ingredient_id in chosen
+                    )
+                    tag_rows.extend(
+                        (recipe_id, tag_id) for tag_id in rnd.sample(
+                            tag_ids, rnd.randint(1, min(2, len(tag_ids)))
+                        )
+                    )
+                self.insert(
+                    RecipeIngredients,
+                    ('recipe_id', 'ingredient_id', 'amount'),
+                    recipe_rows
+                )
+                self.insert(
+                    recipe_tags, ('recipes_id', 'timetag_id'), tag_rows
+                )
+            recipe_ids.extend(batch_ids)
+            elapsed = time.monotonic() - started
+            logger.info(
+                f'Рецептов: {len(recipe_ids)} '
+                f'({len(recipe_ids) / elapsed if elapsed else 0:.0f} в с)'
+            )
+        return recipe_ids
+
+    def create_links(self, model, source, target, source_ids, target_ids,
+                     mean, exclude_self=False):
+        """
+        Создает связи пользователей с рецептами или авторами.
+
+        Количество связей пользователя распределено экспоненциально
+        со средним mean, цели выбираются по распределению Ципфа.
+        При exclude_self пользователь не связывается сам с собой.
+        """
+        if not target_ids or mean <= 0:
+            return
+        rnd = self.random
+        targets = rnd.sample(target_ids, len(target_ids))
+        weights = zipf_cum_weights(len(targets), self.exponent)
+        rows, created = [], 0
+        for source_id in source_ids:
+            size = min(int(rnd.expovariate(1 / mean)), len(targets))
+            chosen = set(rnd.choices(targets, cum_weights=weights, k=size))
+            if exclude_self:
+                chosen.discard(source_id)
+            rows.extend((source_id, target_id) for target_id in chosen)
+            if len(rows) >= self.batch_size:
+                with transaction.atomic():
+                    self.insert(model, (source, target), rows)
+                created += len(rows)
+                rows = []
+        with transaction.atomic():
+            self.insert(model, (source, target), rows)
+        created += len(rows)
+        logger.info(f'{model._meta.verbose_name_plural}: {created}')
+
+    def rebuild_derived(self):
+        """
+        Пересобирает данные, которые обычно поддерживаются сигналами:
+        bulk_create и COPY сигналы не отправляют.
+        """
+        with transaction.atomic():
+            for model, field, related_model, foreign_key in COUNTERS:
+                reconcile_counter(model, field, related_model, foreign_key)
+        logger.info('Счетчики пересчитаны')
+        with transaction.atomic():
+            rebuild_shoplist_totals()
+        logger.info('Суммы списков покупок пересобраны')
+        with transaction.atomic():
+            rebuild_feeds()
+        logger.info('Ленты пересобраны')
+        refresh_ranking()
+        logger.info('Рейтинг обновлен')
+        call_command('rebuild_signatures', batch_size=self.batch_size)
@@ -0,0 +1,113 @@
+from django.db import migrations
+
+POSTGRESQL_FORWARD = [
+    'ALTER TABLE recipes_recipes ADD COLUMN search_vector tsvector',
+    """
+    CREATE FUNCTION recipes_recipes_search_vector_update()
+    RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('russian', coalesce(NEW.name, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.name, '')), 'A') ||
+            setweight(to_tsvector('russian', coalesce(NEW.text, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(NEW.text, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER recipes_recipes_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, text ON recipes_recipes
+    FOR EACH ROW EXECUTE PROCEDURE recipes_recipes_search_vector_update()
+    """,
+    'UPDATE recipes_recipes SET name = name',
+    """
+    CREATE INDEX recipes_recipes_search_vector_idx
+    ON recipes_recipes USING GIN (search_vector)
+    """,
+]
+
+POSTGRESQL_BACKWARD = [
+    'DROP TRIGGER recipes_recipes_search_vector_trigger ON recipes_recipes',
+    'DROP FUNCTION recipes_recipes_search_vector_update()',
+    'ALTER TABLE recipes_recipes DROP COLUMN search_vector',
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE recipes_recipes_fts USING fts5(
+        name, text, tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER recipes_recipes_fts_insert
+    AFTER INSERT ON recipes_recipes BEGIN
+        INSERT INTO recipes_recipes_fts (rowid, name, text) VALUES (
+            NEW.id,
+            replace(replace(NEW.name, 'ё', 'е'), 'Ё', 'Е'),
+            replace(replace(NEW.text, 'ё', 'е'), 'Ё', 'Е')
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER recipes_recipes_fts_update
+    AFTER UPDATE OF name, text ON recipes_recipes BEGIN
+        DELETE FROM recipes_recipes_fts WHERE rowid = OLD.id;
+        INSERT INTO recipes_recipes_fts (rowid, name, text) VALUES (
+            NEW.id,
+            replace(replace(NEW.name, 'ё', 'е'), 'Ё', 'Е'),
+            replace(replace(NEW.text, 'ё', 'е'), 'Ё', 'Е')
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER recipes_recipes_fts_delete
+    AFTER DELETE ON recipes_recipes BEGIN
+        DELETE FROM recipes_recipes_fts WHERE rowid = OLD.id;
+    END
+    """,
+    """
+    INSERT INTO recipes_recipes_fts (rowid, name, text)
+    SELECT id, replace(replace(name, 'ё', 'е'), 'Ё', 'Е'),
+        replace(replace(text, 'ё', 'е'), 'Ё', 'Е')
+    FROM recipes_recipes
+    """,
+]
+
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS recipes_recipes_fts_insert',
+    'DROP TRIGGER IF EXISTS recipes_recipes_fts_update',
+    'DROP TRIGGER IF EXISTS recipes_recipes_fts_delete',
+    'DROP TABLE recipes_recipes_fts',
+]
+
+
+def run_statements(schema_editor, statements):
+    vendor = schema_editor.connection.vendor
+    for statement in statements.get(vendor, ()):
+        schema_editor.execute(statement, params=None)
+
+
+def forward(apps, schema_editor):
+    run_statements(schema_editor, {
+        'postgresql': POSTGRESQL_FORWARD,
+        'sqlite': SQLITE_FORWARD,
+    })
+
+
+def backward(apps, schema_editor):
+    run_statements(schema_editor, {
+        'postgresql': POSTGRESQL_BACKWARD,
+        'sqlite': SQLITE_BACKWARD,
+    })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_auto_20230828_1409'),
+    ]
+
+    operations = [
+        migrations.RunPython(forward, backward),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 3.2.3 on 2026-10-18 00:30
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_shoplist_ingredients(apps, schema_editor):
+    RecipeIngredients = apps.get_model('recipes', 'RecipeIngredients')
+    ShoplistIngredients = apps.get_model('recipes', 'ShoplistIngredients')
+    totals = RecipeIngredients.objects.filter(
+        recipe__shoplist__isnull=False
+    ).values(
+        'recipe__shoplist__user', 'ingredient'
+    ).annotate(total=models.Sum('amount')).order_by()
+    ShoplistIngredients.objects.bulk_create(
+        (ShoplistIngredients(
+            user_id=row['recipe__shoplist__user'],
+            ingredient_id=row['ingredient'],
+            amount=row['total']
+        ) for row in totals.iterator()),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0005_recipes_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShoplistIngredients',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.PositiveIntegerField(verbose_name='Количество')),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shoplist_ingredients', to='recipes.ingredients', verbose_name='Ингредиент')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shoplist_ingredients', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Ингредиент списка покупок',
+                'verbose_name_plural': 'Ингредиенты списков покупок',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='shoplistingredients',
+            constraint=models.UniqueConstraint(fields=('user', 'ingredient'), name='unique_shoplist_ingredient'),
+        ),
+        migrations.RunPython(
+            fill_shoplist_ingredients, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 3.2.3 on 2026-10-18 00:36
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    counters = (
+        ('recipes', 'Recipes', 'favorites_count', 'Favorites', 'recipe'),
+        ('recipes', 'Recipes', 'in_carts_count', 'Shoplist', 'recipe'),
+        ('users', 'User', 'recipes_count', 'Recipes', 'author'),
+        ('users', 'User', 'followers_count', 'Subscribe', 'author'),
+    )
+    for app, model_name, field, related_name, foreign_key in counters:
+        model = apps.get_model(app, model_name)
+        related_model = apps.get_model(
+            'users' if related_name == 'Subscribe' else 'recipes',
+            related_name
+        )
+        model.objects.update(**{field: Coalesce(Subquery(
+            related_model.objects.filter(
+                **{foreign_key: OuterRef('pk')}
+            ).order_by().values(foreign_key).annotate(
+                total=Count('pk')
+            ).values('total')
+        ), 0)})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_shoplistingredients'),
+        ('users', '0002_user_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipes',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество добавлений в избранное'),
+        ),
+        migrations.AddField(
+            model_name='recipes',
+            name='in_carts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество добавлений в списки покупок'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 3.2.3 on 2026-10-18 00:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_feedentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RankingState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('favorites_last_id', models.BigIntegerField(default=0, verbose_name='Последняя учтенная запись избранного')),
+                ('shoplist_last_id', models.BigIntegerField(default=0, verbose_name='Последняя учтенная запись списка покупок')),
+                ('refreshed_at', models.DateTimeField(null=True, verbose_name='Время последнего пересчета')),
+            ],
+            options={
+                'verbose_name': 'Состояние рейтинга',
+                'verbose_name_plural': 'Состояние рейтинга',
+            },
+        ),
+        migrations.CreateModel(
+            name='RecipeRanking',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ranking', serialize=False, to='recipes.recipes', verbose_name='Рецепт')),
+                ('score', models.FloatField(db_index=True, verbose_name='Оценка популярности')),
+            ],
+            options={
+                'verbose_name': 'Рейтинг рецепта',
+                'verbose_name_plural': 'Рейтинги рецептов',
+            },
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 3.2.3 on 2026-10-18 00:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+from recipes.minhash import compute_buckets, compute_signature
+
+
+def fill_signatures(apps, schema_editor):
+    RecipeIngredients = apps.get_model('recipes', 'RecipeIngredients')
+    RecipeSignature = apps.get_model('recipes', 'RecipeSignature')
+    RecipeBand = apps.get_model('recipes', 'RecipeBand')
+    ingredients = {}
+    for recipe_id, ingredient_id in RecipeIngredients.objects.values_list(
+        'recipe_id', 'ingredient_id'
+    ).iterator():
+        ingredients.setdefault(recipe_id, set()).add(ingredient_id)
+    signatures, bands = [], []
+    for recipe_id, ingredient_ids in ingredients.items():
+        signature = compute_signature(ingredient_ids)
+        signatures.append(RecipeSignature(
+            recipe_id=recipe_id, signature=signature.tobytes()
+        ))
+        bands.extend(
+            RecipeBand(recipe_id=recipe_id, band=band, bucket=bucket)
+            for band, bucket in enumerate(compute_buckets(signature))
+        )
+    RecipeSignature.objects.bulk_create(signatures, batch_size=1000)
+    RecipeBand.objects.bulk_create(bands, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_reciperanking'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeSignature',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='signature', serialize=False, to='recipes.recipes', verbose_name='Рецепт')),
+                ('signature', models.BinaryField(verbose_name='Подпись')),
+            ],
+            options={
+                'verbose_name': 'Подпись рецепта',
+                'verbose_name_plural': 'Подписи рецептов',
+            },
+        ),
+        migrations.CreateModel(
+            name='RecipeBand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.PositiveSmallIntegerField(verbose_name='Номер полосы')),
+                ('bucket', models.BigIntegerField(verbose_name='Корзина')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bands', to='recipes.recipes', verbose_name='Рецепт')),
+            ],
+            options={
+                'verbose_name': 'Полоса подписи',
+                'verbose_name_plural': 'Полосы подписей',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='recipeband',
+            index=models.Index(fields=['band', 'bucket'], name='recipe_band_bucket_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='recipeband',
+            constraint=models.UniqueConstraint(fields=('recipe', 'band'), name='unique_recipe_band'),
+        ),
+        migrations.RunPython(fill_signatures, migrations.RunPython.noop),
+    ]
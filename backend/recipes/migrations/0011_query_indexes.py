@@ -0,0 +1,28 @@
+# Generated by Django 3.2.3 on 2026-10-18 00:48
+
+from django.db import migrations, models
+from foodgram.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('recipes', '0010_recipesignature'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='ingredients',
+            index=models.Index(fields=['name'], name='ingredient_name_pattern_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        AddIndexConcurrently(
+            model_name='recipeingredients',
+            index=models.Index(fields=['recipe', 'ingredient', 'amount'], name='recipe_ingredient_amount_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='recipes',
+            index=models.Index(fields=['author', '-id'], name='recipe_author_id_idx'),
+        ),
+    ]
@@ -0,0 +1,76 @@
+from django.db import migrations
+
+# Копия определений из 0005: миграция не должна зависеть от кода
+# приложения, который может измениться позже.
+TRIGGERS = {
+    'recipes_recipes_fts_insert': """
+        CREATE TRIGGER recipes_recipes_fts_insert
+        AFTER INSERT ON recipes_recipes BEGIN
+            INSERT INTO recipes_recipes_fts (rowid, name, text) VALUES (
+                NEW.id,
+                replace(replace(NEW.name, 'ё', 'е'), 'Ё', 'Е'),
+                replace(replace(NEW.text, 'ё', 'е'), 'Ё', 'Е')
+            );
+        END
+    """,
+    'recipes_recipes_fts_update': """
+        CREATE TRIGGER recipes_recipes_fts_update
+        AFTER UPDATE OF name, text ON recipes_recipes BEGIN
+            DELETE FROM recipes_recipes_fts WHERE rowid = OLD.id;
+            INSERT INTO recipes_recipes_fts (rowid, name, text) VALUES (
+                NEW.id,
+                replace(replace(NEW.name, 'ё', 'е'), 'Ё', 'Е'),
+                replace(replace(NEW.text, 'ё', 'е'), 'Ё', 'Е')
+            );
+        END
+    """,
+    'recipes_recipes_fts_delete': """
+        CREATE TRIGGER recipes_recipes_fts_delete
+        AFTER DELETE ON recipes_recipes BEGIN
+            DELETE FROM recipes_recipes_fts WHERE rowid = OLD.id;
+        END
+    """,
+}
+
+FILL = [
+    'DELETE FROM recipes_recipes_fts',
+    """
+    INSERT INTO recipes_recipes_fts (rowid, name, text)
+    SELECT id, replace(replace(name, 'ё', 'е'), 'Ё', 'Е'),
+        replace(replace(text, 'ё', 'е'), 'Ё', 'Е')
+    FROM recipes_recipes
+    """,
+]
+
+
+def restore_triggers(apps, schema_editor):
+    # AddField в 0007 пересоздал таблицу рецептов на SQLite вместе
+    # с триггерами полнотекстового поиска из 0005.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master "
+            "WHERE type IN ('table', 'trigger') "
+            "AND name LIKE 'recipes_recipes_fts%'"
+        )
+        existing = {name for name, in cursor.fetchall()}
+        if ('recipes_recipes_fts' not in existing
+                or TRIGGERS.keys() <= existing):
+            return
+        for name, statement in TRIGGERS.items():
+            if name not in existing:
+                cursor.execute(statement)
+        for statement in FILL:
+            cursor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_catalogversion'),
+    ]
+
+    operations = [
+        migrations.RunPython(restore_triggers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 3.2.3 on 2026-10-18 01:17
+
+import math
+
+from django.db import migrations, models
+
+
+def convert_scores(apps, schema_editor, function):
+    RecipeRanking = apps.get_model('recipes', 'RecipeRanking')
+    rankings = list(RecipeRanking.objects.all())
+    for ranking in rankings:
+        ranking.score = function(ranking.score)
+    RecipeRanking.objects.bulk_update(rankings, ['score'], batch_size=1000)
+
+
+def to_log(apps, schema_editor):
+    RecipeRanking = apps.get_model('recipes', 'RecipeRanking')
+    RecipeRanking.objects.filter(score__lte=0).delete()
+    convert_scores(apps, schema_editor, math.log)
+
+
+def from_log(apps, schema_editor):
+    convert_scores(apps, schema_editor, math.exp)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0013_restore_search_triggers'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reciperanking',
+            name='score',
+            field=models.FloatField(db_index=True, verbose_name='Логарифм оценки популярности'),
+        ),
+        migrations.RunPython(to_log, from_log),
+    ]
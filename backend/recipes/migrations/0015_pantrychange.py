@@ -0,0 +1,27 @@
+# Generated by Django 3.2.3 on 2026-10-18 01:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0014_ranking_log_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PantryChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField(unique=True, verbose_name='Версия связей')),
+                ('recipe_id', models.IntegerField(verbose_name='id рецепта')),
+                ('ingredient_ids', models.JSONField(verbose_name='id ингредиентов')),
+                ('added', models.BooleanField(verbose_name='Ингредиенты добавлены')),
+            ],
+            options={
+                'verbose_name': 'Изменение связей рецепта',
+                'verbose_name_plural': 'Изменения связей рецептов',
+            },
+        ),
+    ]
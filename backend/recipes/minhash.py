@@ -0,0 +1,176 @@
+import hashlib
+import random
+from array import array
+from functools import lru_cache
+from threading import local
+
+from django.db import transaction
+from django.db.models import Q
+
+from recipes.models import RecipeBand, RecipeIngredients, RecipeSignature
+
+# 20 полос по 3 строки: пары с коэффициентом Жаккара 0.5 становятся
+# кандидатами с вероятностью около 0.92, с коэффициентом 0.1 — около 0.02.
+BANDS = 20
+ROWS = 3
+PERMUTATIONS = BANDS * ROWS
+PRIME = 2 ** 31 - 1
+
+# Рецепты, отмеченные в текущей транзакции потока, и обработчик ее
+# фиксации, который пересчитает их подписи.
+_pending = local()
+
+_random = random.Random(20230101)
+COEFFICIENTS = [
+    (_random.randrange(1, PRIME), _random.randrange(0, PRIME))
+    for _ in range(PERMUTATIONS)
+]
+
+
+@lru_cache(maxsize=65536)
+def ingredient_hashes(ingredient_id):
+    """
+    Возвращает значения всех хэш-функций для ингредиента.
+    """
+    return tuple((a * ingredient_id + b) % PRIME for a, b in COEFFICIENTS)
+
+
+def compute_signature(ingredient_ids):
+    """
+    Возвращает MinHash-подпись набора ингредиентов: поэлементный минимум
+    хэшей его ингредиентов.
+    """
+    return array('I', map(min, zip(*map(ingredient_hashes, ingredient_ids))))
+
+
+def compute_buckets(signature):
+    """
+    Возвращает номера корзин подписи по полосам.
+    """
+    buckets = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS].tobytes()
+        digest = hashlib.blake2b(rows, digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, 'big', signed=True))
+    return buckets
+
+
+def load_signature(data):
+    """
+    Восстанавливает подпись из двоичного поля.
+    """
+    signature = array('I')
+    signature.frombytes(bytes(data))
+    return signature
+
+
+def estimate_similarity(first, second):
+    """
+    Оценивает коэффициент Жаккара по доле совпавших значений подписей.
+    """
+    return sum(a == b for a, b in zip(first, second)) / PERMUTATIONS
+
+
+def store_signatures(ingredients_by_recipe):
+    """
+    Пересчитывает подписи и корзины для рецептов из словаря
+    id рецепта -> id ингредиентов. Рецепты без ингредиентов
+    остаются без подписи.
+    """
+    recipe_ids = list(ingredients_by_recipe)
+    RecipeSignature.objects.filter(recipe_id__in=recipe_ids).delete()
+    RecipeBand.objects.filter(recipe_id__in=recipe_ids).delete()
+    signatures, bands = [], []
+    for recipe_id, ingredient_ids in ingredients_by_recipe.items():
+        if not ingredient_ids:
+            continue
+        signature = compute_signature(ingredient_ids)
+        signatures.append(RecipeSignature(
+            recipe_id=recipe_id, signature=signature.tobytes()
+        ))
+        bands.extend(
+            RecipeBand(recipe_id=recipe_id, band=band, bucket=bucket)
+            for band, bucket in enumerate(compute_buckets(signature))
+        )
+    RecipeSignature.objects.bulk_create(signatures, batch_size=1000)
+    RecipeBand.objects.bulk_create(bands, batch_size=1000)
+
+
+def ingredients_of(recipe_ids):
+    """
+    Возвращает словарь id рецепта -> множество id его ингредиентов.
+    """
+    result = {recipe_id: set() for recipe_id in recipe_ids}
+    rows = RecipeIngredients.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values_list('recipe_id', 'ingredient_id')
+    for recipe_id, ingredient_id in rows:
+        result[recipe_id].add(ingredient_id)
+    return result
+
+
+@transaction.atomic
+def update_signatures(recipe_ids):
+    """
+    Пересчитывает подписи рецептов по их текущим ингредиентам.
+    """
+    store_signatures(ingredients_of(recipe_ids))
+
+
+def schedule_signature_update(recipe_id):
+    """
+    Пересчитывает подпись рецепта после фиксации текущей транзакции.
+
+    Рецепты, отмеченные в одной транзакции, пересчитываются один раз
+    после ее фиксации, сколько бы строк ингредиентов в них ни менялось.
+    """
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        update_signatures([recipe_id])
+        return
+    pending = getattr(_pending, 'flush', None)
+    # Обработчик откатившейся транзакции удаляется из списка
+    # обработчиков, выполненный обработчик сбрасывает себя сам.
+    if pending is None or not any(
+        callback[1] is pending for callback in connection.run_on_commit
+    ):
+        recipe_ids = _pending.recipe_ids = set()
+
+        def flush():
+            if _pending.flush is flush:
+                _pending.flush = None
+            update_signatures(recipe_ids)
+
+        _pending.flush = flush
+        transaction.on_commit(flush)
+    _pending.recipe_ids.add(recipe_id)
+
+
+def similar_recipes(recipe_id):
+    """
+    Возвращает пары (id рецепта, оценка сходства) для рецептов, попавших
+    с рецептом recipe_id в одну корзину хотя бы одной полосы, по убыванию
+    сходства.
+    """
+    try:
+        signature = load_signature(
+            RecipeSignature.objects.get(recipe_id=recipe_id).signature
+        )
+    except RecipeSignature.DoesNotExist:
+        return []
+    condition = Q()
+    for band, bucket in enumerate(compute_buckets(signature)):
+        condition |= Q(band=band, bucket=bucket)
+    candidates = RecipeBand.objects.filter(condition).exclude(
+        recipe_id=recipe_id
+    ).values('recipe_id').distinct()
+    result = [
+        (candidate_id, estimate_similarity(
+            signature, load_signature(data)
+        ))
+        for candidate_id, data in RecipeSignature.objects.filter(
+            recipe_id__in=candidates
+        ).values_list('recipe_id', 'signature')
+    ]
+    result.sort(key=lambda item: (-item[1], -item[0]))
+    return result
@@ -1,8 +1,12 @@
 from django.core.validators import MaxValueValidator, MinValueValidator
 from colorfield.fields import ColorField
 from django.db import models
+from django.db.models import Exists, F, OuterRef, Prefetch, Value, Window
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import RowNumber
 from foodgram.settings import (INGREDIENT_NAME, INGREDIENT_UNITS,
                                RECIPE_NAME, TAG_COLOR, TAG_NAME, TAG_SLUG)
+from recipes.search import search_recipes
 from users.models import User
 
 
@@ -28,6 +32,13 @@ class Ingredients(models.Model):
                 name='unique_name_measurement_unit'
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=['name'],
+                name='ingredient_name_pattern_idx',
+                opclasses=['varchar_pattern_ops']
+            ),
+        ]
 
     def __str__(self) -> str:
         return f'{self.name}, {self.measurement_unit}'
@@ -61,6 +72,76 @@ class TimeTag(models.Model):
         return self.name
 
 
+class RecipesQuerySet(models.QuerySet):
+    """
+    Набор запросов для модели Recipes.
+    """
+
+    def with_related(self):
+        """
+        Подгружает автора, временные метки и ингредиенты рецептов
+        фиксированным числом запросов.
+        """
+        return self.select_related('author').prefetch_related(
+            'tags',
+            Prefetch(
+                'recipe_ingredients',
+                queryset=RecipeIngredients.objects.select_related(
+                    'ingredient'
+                )
+            )
+        )
+
+    def with_user_flags(self, user):
+        """
+        Добавляет признаки is_favorited и is_in_shopping_cart
+        для пользователя.
+        """
+        if user.is_anonymous:
+            return self.annotate(
+                is_favorited=Value(False, output_field=models.BooleanField()),
+                is_in_shopping_cart=Value(
+                    False, output_field=models.BooleanField()
+                )
+            )
+        return self.annotate(
+            is_favorited=Exists(Favorites.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+            is_in_shopping_cart=Exists(Shoplist.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            ))
+        )
+
+    def search(self, value):
+        """
+        Выполняет полнотекстовый поиск по названию и описанию рецептов.
+        """
+        return search_recipes(self, value)
+
+    def top_per_author(self, limit):
+        """
+        Оставляет не более limit последних рецептов каждого автора.
+
+        Рецепты нумеруются оконной функцией ROW_NUMBER() в разрезе
+        автора, поэтому выборка для любого числа авторов выполняется
+        одним запросом.
+        """
+        ranked = self.annotate(
+            row_number=Window(
+                expression=RowNumber(),
+                partition_by=[F('author_id')],
+                order_by=F('id').desc()
+            )
+        ).order_by().values('id', 'row_number')
+        sql, params = ranked.query.sql_with_params()
+        return self.filter(id__in=RawSQL(
+            f'SELECT ranked.id FROM ({sql}) ranked '
+            f'WHERE ranked.row_number <= %s',
+            (*params, limit)
+        ))
+
+
 class Recipes(models.Model):
     """
     Класс, представляющий рецепты.
@@ -105,6 +186,18 @@ class Recipes(models.Model):
         verbose_name='Изображение готового блюда',
         upload_to='image_recipes/',
     )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='Количество добавлений в избранное',
+        default=0,
+        editable=False
+    )
+    in_carts_count = models.PositiveIntegerField(
+        verbose_name='Количество добавлений в списки покупок',
+        default=0,
+        editable=False
+    )
+
+    objects = RecipesQuerySet.as_manager()
 
     class Meta:
         ordering = ['-id']
@@ -116,6 +209,12 @@ class Recipes(models.Model):
                 name='unique_author_recipe'
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=['author', '-id'],
+                name='recipe_author_id_idx'
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.name
@@ -151,6 +250,12 @@ class RecipeIngredients(models.Model):
     class Meta:
         verbose_name = 'Ингредиент для рецепта'
         verbose_name_plural = 'Ингредиенты для рецепта'
+        indexes = [
+            models.Index(
+                fields=['recipe', 'ingredient', 'amount'],
+                name='recipe_ingredient_amount_idx'
+            ),
+        ]
 
     def __str__(self) -> str:
         return (
@@ -220,3 +325,260 @@ class Shoplist(models.Model):
 
     def __str__(self) -> str:
         return f'{self.user} добавляет {self.recipe} в список покупок'
+
+
+class ShoplistIngredients(models.Model):
+    """
+    Класс, представляющий суммарное количество ингредиента
+    в списке покупок пользователя.
+
+    Строки поддерживаются при добавлении и удалении рецептов из списка
+    покупок и при изменении ингредиентов рецептов.
+    """
+    user = models.ForeignKey(
+        User,
+        verbose_name='Пользователь',
+        on_delete=models.CASCADE,
+        related_name='shoplist_ingredients'
+    )
+    ingredient = models.ForeignKey(
+        Ingredients,
+        verbose_name='Ингредиент',
+        on_delete=models.CASCADE,
+        related_name='shoplist_ingredients'
+    )
+    amount = models.PositiveIntegerField(
+        verbose_name='Количество',
+    )
+
+    class Meta:
+        verbose_name = 'Ингредиент списка покупок'
+        verbose_name_plural = 'Ингредиенты списков покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='unique_shoplist_ingredient'
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.user}: {self.ingredient} - {self.amount}'
+
+
+class FeedEntry(models.Model):
+    """
+    Класс, представляющий запись ленты рецептов подписчика.
+
+    Записи создаются при публикации рецепта автором (fan-out on write)
+    и при подписке на автора, удаляются при отписке.
+    """
+    user = models.ForeignKey(
+        User,
+        verbose_name='Подписчик',
+        on_delete=models.CASCADE,
+        related_name='feed_entries'
+    )
+    recipe = models.ForeignKey(
+        Recipes,
+        verbose_name='Рецепт',
+        on_delete=models.CASCADE,
+        related_name='feed_entries'
+    )
+    author = models.ForeignKey(
+        User,
+        verbose_name='Автор рецепта',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_feed_entry'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', 'author'],
+                name='feed_entry_user_author_idx'
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.recipe} в ленте {self.user}'
+
+
+class RecipeRanking(models.Model):
+    """
+    Класс, представляющий рейтинг популярности рецепта.
+
+    Хранится логарифм оценки, приведенной к фиксированной эпохе, поэтому
+    затухание со временем не требует обновления строк, а порядок по score
+    совпадает с порядком по текущей оценке (см. recipes.ranking).
+    """
+    recipe = models.OneToOneField(
+        Recipes,
+        verbose_name='Рецепт',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='ranking'
+    )
+    score = models.FloatField(
+        verbose_name='Логарифм оценки популярности',
+        db_index=True
+    )
+
+    class Meta:
+        verbose_name = 'Рейтинг рецепта'
+        verbose_name_plural = 'Рейтинги рецептов'
+
+    def __str__(self) -> str:
+        return f'{self.recipe}: {self.score}'
+
+
+class RankingState(models.Model):
+    """
+    Класс, хранящий позицию последнего пересчета рейтинга.
+    """
+    favorites_last_id = models.BigIntegerField(
+        verbose_name='Последняя учтенная запись избранного',
+        default=0
+    )
+    shoplist_last_id = models.BigIntegerField(
+        verbose_name='Последняя учтенная запись списка покупок',
+        default=0
+    )
+    refreshed_at = models.DateTimeField(
+        verbose_name='Время последнего пересчета',
+        null=True
+    )
+
+    class Meta:
+        verbose_name = 'Состояние рейтинга'
+        verbose_name_plural = 'Состояние рейтинга'
+
+    def __str__(self) -> str:
+        return f'Рейтинг пересчитан {self.refreshed_at}'
+
+
+class RecipeSignature(models.Model):
+    """
+    Класс, хранящий MinHash-подпись набора ингредиентов рецепта.
+
+    Подпись хранится как массив 32-битных чисел в двоичном поле.
+    """
+    recipe = models.OneToOneField(
+        Recipes,
+        verbose_name='Рецепт',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='signature'
+    )
+    signature = models.BinaryField(
+        verbose_name='Подпись'
+    )
+
+    class Meta:
+        verbose_name = 'Подпись рецепта'
+        verbose_name_plural = 'Подписи рецептов'
+
+    def __str__(self) -> str:
+        return f'Подпись {self.recipe}'
+
+
+class RecipeBand(models.Model):
+    """
+    Класс, представляющий корзину LSH-полосы подписи рецепта.
+
+    Рецепты, у которых совпала корзина хотя бы в одной полосе, становятся
+    кандидатами в похожие.
+    """
+    recipe = models.ForeignKey(
+        Recipes,
+        verbose_name='Рецепт',
+        on_delete=models.CASCADE,
+        related_name='bands'
+    )
+    band = models.PositiveSmallIntegerField(
+        verbose_name='Номер полосы'
+    )
+    bucket = models.BigIntegerField(
+        verbose_name='Корзина'
+    )
+
+    class Meta:
+        verbose_name = 'Полоса подписи'
+        verbose_name_plural = 'Полосы подписей'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'band'],
+                name='unique_recipe_band'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['band', 'bucket'],
+                name='recipe_band_bucket_idx'
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.recipe}: {self.band}/{self.bucket}'
+
+
+class CatalogVersion(models.Model):
+    """
+    Класс, хранящий версию справочника.
+
+    Версия общая для всех процессов: по ней процессы узнают, что
+    справочник изменился, и перестраивают свои индексы в памяти.
+    """
+    name = models.CharField(
+        verbose_name='Справочник',
+        max_length=50,
+        unique=True
+    )
+    version = models.BigIntegerField(
+        verbose_name='Версия',
+        default=0
+    )
+
+    class Meta:
+        verbose_name = 'Версия справочника'
+        verbose_name_plural = 'Версии справочников'
+
+    def __str__(self) -> str:
+        return f'{self.name}: {self.version}'
+
+
+class PantryChange(models.Model):
+    """
+    Класс, хранящий изменение связей рецепта с ингредиентами.
+
+    Каждой версии связей соответствует одно изменение. Процесс, индекс
+    которого отстал, применяет изменения после своей версии вместо
+    перестроения индекса. Хранятся последние PANTRY_LOG_SIZE изменений.
+    """
+    version = models.BigIntegerField(
+        verbose_name='Версия связей',
+        unique=True
+    )
+    recipe_id = models.IntegerField(
+        verbose_name='id рецепта'
+    )
+    ingredient_ids = models.JSONField(
+        verbose_name='id ингредиентов'
+    )
+    added = models.BooleanField(
+        verbose_name='Ингредиенты добавлены'
+    )
+
+    class Meta:
+        verbose_name = 'Изменение связей рецепта'
+        verbose_name_plural = 'Изменения связей рецептов'
+
+    def __str__(self) -> str:
+        return f'{self.version}: {self.recipe_id}'
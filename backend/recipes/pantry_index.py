@@ -0,0 +1,165 @@
+from array import array
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from functools import partial
+from threading import Lock
+
+from foodgram.settings import PANTRY_LOG_SIZE
+from recipes.catalog import (RECIPE_INGREDIENTS_CATALOG, bump_catalog_version,
+                             get_catalog_version)
+from recipes.models import PantryChange, RecipeIngredients
+
+
+class PantryIndex:
+    """
+    Обратный индекс: ингредиент -> отсортированный массив id рецептов.
+
+    Массивы хранят id как 32-битные числа, что в несколько раз компактнее
+    множеств Python. Индекс строится при первом обращении в каждом
+    процессе. Изменения, сделанные в этом процессе, применяются к нему
+    на месте. Изменения из других процессов читаются из журнала
+    PantryChange, индекс перестраивается, только если журнал не
+    покрывает все пропущенные версии.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._version = None
+        self._postings = {}
+        self._sizes = {}
+
+    def _build(self):
+        """
+        Загружает связи рецептов и ингредиентов из базы.
+        """
+        postings = defaultdict(lambda: array('I'))
+        sizes = Counter()
+        rows = RecipeIngredients.objects.order_by(
+            'ingredient_id', 'recipe_id'
+        ).values_list('ingredient_id', 'recipe_id')
+        for ingredient_id, recipe_id in rows.iterator(chunk_size=10000):
+            postings[ingredient_id].append(recipe_id)
+            sizes[recipe_id] += 1
+        return dict(postings), dict(sizes)
+
+    def _change(self, recipe_id, ingredient_ids, added):
+        """
+        Добавляет рецепт в массивы ингредиентов или убирает из них.
+        """
+        for ingredient_id in ingredient_ids:
+            posting = self._postings.setdefault(ingredient_id, array('I'))
+            position = bisect_left(posting, recipe_id)
+            present = (
+                position < len(posting) and posting[position] == recipe_id
+            )
+            if added and not present:
+                posting.insert(position, recipe_id)
+                self._sizes[recipe_id] = self._sizes.get(recipe_id, 0) + 1
+            elif not added and present:
+                del posting[position]
+                self._sizes[recipe_id] -= 1
+                if not self._sizes[recipe_id]:
+                    del self._sizes[recipe_id]
+
+    def _catch_up(self, version):
+        """
+        Применяет изменения из журнала после версии индекса до version.
+
+        Возвращает False, если журнал покрывает не все пропущенные
+        версии, например после загрузки рецептов командами
+        import_recipes и seed_scale.
+        """
+        if self._version is None or version - self._version > PANTRY_LOG_SIZE:
+            return False
+        changes = list(PantryChange.objects.filter(
+            version__gt=self._version, version__lte=version
+        ).order_by('version').values_list(
+            'version', 'recipe_id', 'ingredient_ids', 'added'
+        ))
+        if [change[0] for change in changes] != list(
+            range(self._version + 1, version + 1)
+        ):
+            return False
+        for _, recipe_id, ingredient_ids, added in changes:
+            self._change(recipe_id, ingredient_ids, added)
+        return True
+
+    def _ensure_fresh(self):
+        """
+        Обновляет индекс, если связи изменились в другом процессе.
+
+        Версия связей общая для всех процессов, поэтому изменения
+        попадают в индекс не позже чем через CATALOG_VERSION_TTL секунд.
+        """
+        version = get_catalog_version(RECIPE_INGREDIENTS_CATALOG)
+        if self._version is not None and version <= self._version:
+            return
+        with self._lock:
+            if self._version is not None and version <= self._version:
+                return
+            if not self._catch_up(version):
+                self._postings, self._sizes = self._build()
+            self._version = version
+
+    def _apply(self, recipe_id, ingredient_ids, added, version):
+        """
+        Применяет изменение из этого процесса к построенному индексу.
+
+        Изменение применяется, только если индекс отстает ровно на одну
+        версию. Иначе индекс догонит журнал при следующем обращении.
+        """
+        with self._lock:
+            if self._version is None or version != self._version + 1:
+                return
+            self._change(recipe_id, ingredient_ids, added)
+            self._version = version
+
+    @staticmethod
+    def _record(recipe_id, ingredient_ids, added, version):
+        """
+        Записывает изменение в журнал и удаляет устаревшие записи.
+        """
+        PantryChange.objects.create(
+            version=version,
+            recipe_id=recipe_id,
+            ingredient_ids=list(ingredient_ids),
+            added=added
+        )
+        PantryChange.objects.filter(
+            version__lte=version - PANTRY_LOG_SIZE
+        ).delete()
+
+    def track(self, recipe_id, ingredient_ids, added):
+        """
+        Отмечает добавление или удаление ингредиентов рецепта после
+        фиксации текущей транзакции.
+        """
+        ingredient_ids = tuple(ingredient_ids)
+        bump_catalog_version(
+            RECIPE_INGREDIENTS_CATALOG,
+            partial(self._apply, recipe_id, ingredient_ids, added),
+            partial(self._record, recipe_id, ingredient_ids, added)
+        )
+
+    def search(self, ingredient_ids, coverage=100):
+        """
+        Возвращает пары (id рецепта, доля покрытия) для рецептов, у которых
+        не меньше coverage процентов ингредиентов входит в ingredient_ids.
+
+        Результат упорядочен по убыванию покрытия, затем по убыванию id.
+        """
+        self._ensure_fresh()
+        postings, sizes = self._postings, self._sizes
+        hits = Counter()
+        for ingredient_id in set(ingredient_ids):
+            hits.update(postings.get(ingredient_id, ()))
+        result = []
+        for recipe_id, count in hits.items():
+            size = sizes.get(recipe_id)
+            if size and count * 100 >= coverage * size:
+                result.append((recipe_id, count / size))
+        result.sort(key=lambda item: (-item[1], -item[0]))
+        return result
+
+
+pantry_index = PantryIndex()
@@ -0,0 +1,104 @@
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+from foodgram.settings import (RANKING_FAVORITE_WEIGHT,
+                               RANKING_HALF_LIFE_HOURS,
+                               RANKING_SHOPLIST_WEIGHT)
+from recipes.models import Favorites, RankingState, RecipeRanking, Shoplist
+
+RANKING_EPOCH = datetime(2023, 1, 1, tzinfo=dt_timezone.utc)
+DECAY_RATE = math.log(2) / (RANKING_HALF_LIFE_HOURS * 3600)
+
+
+def log_growth(moment):
+    """
+    Возвращает логарифм множителя события в момент moment относительно
+    эпохи.
+
+    Оценка события весом w в момент now равна
+    w * exp(-DECAY_RATE * (now - t)). Хранится логарифм суммы
+    w * exp(DECAY_RATE * (t - эпоха)): сам множитель растет экспоненциально
+    и через несколько лет после эпохи не помещается в float, а его
+    логарифм растет линейно.
+    """
+    return DECAY_RATE * (moment - RANKING_EPOCH).total_seconds()
+
+
+def log_add(first, second):
+    """
+    Возвращает log(exp(first) + exp(second)) без переполнения.
+    """
+    high, low = max(first, second), min(first, second)
+    return high + math.log1p(math.exp(low - high))
+
+
+def current_score(score, now=None):
+    """
+    Переводит хранимую оценку в оценку на момент now.
+    """
+    now = now or timezone.now()
+    return math.exp(score - log_growth(now))
+
+
+def new_activity(model, last_id):
+    """
+    Возвращает количество новых записей model по рецептам и
+    наибольший учтенный id.
+    """
+    max_id = model.objects.aggregate(max_id=Max('id'))['max_id'] or last_id
+    counts = dict(
+        model.objects.filter(
+            id__gt=last_id, id__lte=max_id
+        ).values('recipe_id').annotate(
+            total=Count('id')
+        ).order_by().values_list('recipe_id', 'total')
+    )
+    return counts, max_id
+
+
+@transaction.atomic
+def refresh_ranking(now=None):
+    """
+    Добавляет в рейтинг записи избранного и списков покупок, появившиеся
+    после прошлого пересчета. Возвращает число обновленных рецептов.
+
+    Время новых событий приравнивается ко времени пересчета, поэтому
+    пересчет стоит запускать регулярно.
+    """
+    now = now or timezone.now()
+    state, _ = RankingState.objects.select_for_update().get_or_create(pk=1)
+    favorites, state.favorites_last_id = new_activity(
+        Favorites, state.favorites_last_id
+    )
+    shoplist, state.shoplist_last_id = new_activity(
+        Shoplist, state.shoplist_last_id
+    )
+    weights = {}
+    for counts, weight in ((favorites, RANKING_FAVORITE_WEIGHT),
+                           (shoplist, RANKING_SHOPLIST_WEIGHT)):
+        for recipe_id, total in counts.items():
+            weights[recipe_id] = weights.get(recipe_id, 0) + total * weight
+    factor = log_growth(now)
+    increments = {
+        recipe_id: math.log(weight) + factor
+        for recipe_id, weight in weights.items() if weight > 0
+    }
+
+    existing = RecipeRanking.objects.in_bulk(list(increments))
+    for recipe_id, ranking in existing.items():
+        ranking.score = log_add(ranking.score, increments[recipe_id])
+    RecipeRanking.objects.bulk_update(
+        existing.values(), ['score'], batch_size=1000
+    )
+    RecipeRanking.objects.bulk_create(
+        [RecipeRanking(recipe_id=recipe_id, score=increment)
+         for recipe_id, increment in increments.items()
+         if recipe_id not in existing],
+        batch_size=1000
+    )
+    state.refreshed_at = now
+    state.save()
+    return len(increments)
@@ -0,0 +1,143 @@
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Value
+from django.db.models.expressions import RawSQL
+
+POSTGRESQL_QUERY = (
+    "(plainto_tsquery('russian', %s) || plainto_tsquery('english', %s))"
+)
+
+SQLITE_NORMALIZE = "replace(replace({}, 'ё', 'е'), 'Ё', 'Е')"
+
+SQLITE_FTS_TABLE = """
+    CREATE VIRTUAL TABLE recipes_recipes_fts USING fts5(
+        name, text, tokenize = 'unicode61 remove_diacritics 2'
+    )
+"""
+
+# Триггеры, поддерживающие таблицу FTS5 в актуальном состоянии.
+# Изменение схемы Recipes на SQLite пересоздает таблицу рецептов
+# и удаляет ее триггеры, их восстанавливает restore_sqlite_search.
+# Миграции 0005 и 0013 содержат собственные неизменные копии этого SQL.
+SQLITE_TRIGGERS = {
+    'recipes_recipes_fts_insert': f"""
+        CREATE TRIGGER recipes_recipes_fts_insert
+        AFTER INSERT ON recipes_recipes BEGIN
+            INSERT INTO recipes_recipes_fts (rowid, name, text) VALUES (
+                NEW.id,
+                {SQLITE_NORMALIZE.format('NEW.name')},
+                {SQLITE_NORMALIZE.format('NEW.text')}
+            );
+        END
+    """,
+    'recipes_recipes_fts_update': f"""
+        CREATE TRIGGER recipes_recipes_fts_update
+        AFTER UPDATE OF name, text ON recipes_recipes BEGIN
+            DELETE FROM recipes_recipes_fts WHERE rowid = OLD.id;
+            INSERT INTO recipes_recipes_fts (rowid, name, text) VALUES (
+                NEW.id,
+                {SQLITE_NORMALIZE.format('NEW.name')},
+                {SQLITE_NORMALIZE.format('NEW.text')}
+            );
+        END
+    """,
+    'recipes_recipes_fts_delete': """
+        CREATE TRIGGER recipes_recipes_fts_delete
+        AFTER DELETE ON recipes_recipes BEGIN
+            DELETE FROM recipes_recipes_fts WHERE rowid = OLD.id;
+        END
+    """,
+}
+
+SQLITE_FILL = [
+    'DELETE FROM recipes_recipes_fts',
+    f"""
+    INSERT INTO recipes_recipes_fts (rowid, name, text)
+    SELECT id, {SQLITE_NORMALIZE.format('name')},
+        {SQLITE_NORMALIZE.format('text')}
+    FROM recipes_recipes
+    """,
+]
+
+
+def restore_sqlite_search(connection):
+    """
+    Восстанавливает триггеры полнотекстового поиска на SQLite.
+
+    Недостающие триггеры создаются заново, а таблица FTS5 заполняется
+    повторно, так как изменения рецептов без триггеров в нее не попали.
+    Ничего не делает на других базах данных и до создания таблицы FTS5.
+    Возвращает True, если триггеры пришлось восстановить.
+    """
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master "
+            "WHERE type IN ('table', 'trigger') "
+            "AND name LIKE 'recipes_recipes_fts%'"
+        )
+        existing = {name for name, in cursor.fetchall()}
+        if ('recipes_recipes_fts' not in existing
+                or SQLITE_TRIGGERS.keys() <= existing):
+            return False
+        for name, statement in SQLITE_TRIGGERS.items():
+            if name not in existing:
+                cursor.execute(statement)
+        for statement in SQLITE_FILL:
+            cursor.execute(statement)
+    return True
+
+
+def fts5_query(value):
+    """
+    Преобразует строку поиска в запрос FTS5.
+
+    Каждое слово ищется по началу, спецсимволы синтаксиса FTS5
+    отбрасываются.
+    """
+    words = re.findall(r'\w+', value.replace('ё', 'е').replace('Ё', 'Е'))
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def search_recipes(queryset, value):
+    """
+    Отбирает рецепты, соответствующие строке поиска, и добавляет
+    аннотацию search_rank с релевантностью.
+
+    На PostgreSQL используется столбец search_vector с индексом GIN,
+    на SQLite — таблица FTS5 recipes_recipes_fts.
+    """
+    table = queryset.model._meta.db_table
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        params = (value, value)
+        return queryset.filter(RawSQL(
+            f'{table}.search_vector @@ {POSTGRESQL_QUERY}',
+            params,
+            output_field=BooleanField()
+        )).annotate(search_rank=RawSQL(
+            f'ts_rank({table}.search_vector, {POSTGRESQL_QUERY})',
+            params,
+            output_field=FloatField()
+        ))
+    if vendor == 'sqlite':
+        match = fts5_query(value)
+        if not match:
+            return queryset.annotate(
+                search_rank=Value(0.0, output_field=FloatField())
+            ).none()
+        return queryset.filter(id__in=RawSQL(
+            'SELECT rowid FROM recipes_recipes_fts '
+            'WHERE recipes_recipes_fts MATCH %s',
+            (match,)
+        )).annotate(search_rank=RawSQL(
+            '(SELECT -bm25(recipes_recipes_fts) FROM recipes_recipes_fts '
+            f'WHERE recipes_recipes_fts MATCH %s AND rowid = {table}.id)',
+            (match,),
+            output_field=FloatField()
+        ))
+    return queryset.filter(name__icontains=value).annotate(
+        search_rank=Value(0.0, output_field=FloatField())
+    )
@@ -0,0 +1,142 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.db.models.functions import Greatest
+
+from recipes.models import RecipeIngredients, Shoplist, ShoplistIngredients
+
+
+def recipe_amounts(recipe_id):
+    """
+    Возвращает словарь {id ингредиента: количество} для рецепта.
+    """
+    return dict(
+        RecipeIngredients.objects.filter(
+            recipe_id=recipe_id
+        ).values_list('ingredient_id', 'amount')
+    )
+
+
+def amounts_delta(old, new):
+    """
+    Возвращает изменение количеств ингредиентов между двумя словарями.
+    """
+    delta = {}
+    for ingredient_id in old.keys() | new.keys():
+        change = new.get(ingredient_id, 0) - old.get(ingredient_id, 0)
+        if change:
+            delta[ingredient_id] = change
+    return delta
+
+
+@transaction.atomic
+def apply_shoplist_delta(user_ids, delta):
+    """
+    Прибавляет delta к суммам ингредиентов в списках покупок user_ids.
+
+    Строки с одинаковым изменением обновляются одним запросом,
+    обнулившиеся строки удаляются.
+    """
+    user_ids = list(user_ids)
+    if not user_ids or not delta:
+        return
+    added = [
+        ingredient_id for ingredient_id, change in delta.items() if change > 0
+    ]
+    ShoplistIngredients.objects.bulk_create(
+        [ShoplistIngredients(user_id=user_id, ingredient_id=ingredient_id,
+                             amount=0)
+         for user_id in user_ids for ingredient_id in added],
+        ignore_conflicts=True
+    )
+    by_change = defaultdict(list)
+    for ingredient_id, change in delta.items():
+        by_change[change].append(ingredient_id)
+    rows = ShoplistIngredients.objects.filter(user_id__in=user_ids)
+    for change, ingredient_ids in by_change.items():
+        amount = F('amount') + change
+        if change < 0:
+            amount = Greatest(amount, 0)
+        rows.filter(ingredient_id__in=ingredient_ids).update(amount=amount)
+    if len(added) < len(delta):
+        rows.filter(amount=0).delete()
+
+
+def add_recipe_to_shoplist(user_id, recipe_id):
+    """
+    Учитывает ингредиенты рецепта, добавленного в список покупок.
+    """
+    apply_shoplist_delta([user_id], recipe_amounts(recipe_id))
+
+
+def remove_recipe_from_shoplist(user_id, recipe_id):
+    """
+    Вычитает ингредиенты рецепта, удаленного из списка покупок.
+    """
+    apply_shoplist_delta([user_id], amounts_delta(
+        recipe_amounts(recipe_id), {}
+    ))
+
+
+def update_recipe_in_shoplists(recipe_id, old_amounts, new_amounts=None):
+    """
+    Переносит изменение ингредиентов рецепта в списки покупок всех
+    пользователей, добавивших этот рецепт.
+
+    Если new_amounts не переданы, текущие количества читаются из базы.
+    """
+    if new_amounts is None:
+        new_amounts = recipe_amounts(recipe_id)
+    delta = amounts_delta(old_amounts, new_amounts)
+    if not delta:
+        return
+    apply_shoplist_delta(
+        Shoplist.objects.filter(
+            recipe_id=recipe_id
+        ).values_list('user_id', flat=True),
+        delta
+    )
+
+
+def live_shoplist_totals():
+    """
+    Возвращает суммы ингредиентов списков покупок, вычисленные
+    соединением RecipeIngredients и Shoplist.
+    """
+    return {
+        (row['recipe__shoplist__user'], row['ingredient']): row['total']
+        for row in RecipeIngredients.objects.filter(
+            recipe__shoplist__isnull=False
+        ).values(
+            'recipe__shoplist__user', 'ingredient'
+        ).annotate(total=Sum('amount')).order_by().iterator()
+    }
+
+
+def stored_shoplist_totals():
+    """
+    Возвращает суммы ингредиентов из таблицы ShoplistIngredients.
+    """
+    return {
+        (user_id, ingredient_id): amount
+        for user_id, ingredient_id, amount in
+        ShoplistIngredients.objects.values_list(
+            'user_id', 'ingredient_id', 'amount'
+        ).iterator()
+    }
+
+
+@transaction.atomic
+def rebuild_shoplist_totals(batch_size=1000):
+    """
+    Пересобирает таблицу ShoplistIngredients по текущим спискам покупок.
+    """
+    ShoplistIngredients.objects.all().delete()
+    ShoplistIngredients.objects.bulk_create(
+        [ShoplistIngredients(user_id=user_id, ingredient_id=ingredient_id,
+                             amount=amount)
+         for (user_id, ingredient_id), amount
+         in live_shoplist_totals().items()],
+        batch_size=batch_size
+    )
@@ -0,0 +1,156 @@
+from functools import partial
+
+from django.db import connections, transaction
+from django.db.models.signals import (post_delete, post_migrate, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+
+from recipes.catalog import (INGREDIENTS_CATALOG, TAGS_CATALOG,
+                             bump_catalog_version)
+from recipes.counters import change_counter
+from recipes.feed import (backfill_subscription, fan_out_recipe,
+                          prune_subscription)
+from recipes.images import generate_derivatives_safely
+from recipes.minhash import schedule_signature_update
+from recipes.models import (Favorites, Ingredients, RecipeIngredients, Recipes,
+                            Shoplist, TimeTag)
+from recipes.pantry_index import pantry_index
+from recipes.search import restore_sqlite_search
+from recipes.shoplist import (add_recipe_to_shoplist,
+                              remove_recipe_from_shoplist)
+from users.models import Subscribe, User
+
+
+@receiver((post_save, post_delete), sender=Ingredients)
+def ingredients_changed(sender, **kwargs):
+    """
+    Меняет версию справочника ингредиентов, сбрасывая индекс
+    для автодополнения и ETag ответов API.
+    """
+    bump_catalog_version(INGREDIENTS_CATALOG)
+
+
+@receiver((post_save, post_delete), sender=TimeTag)
+def tags_changed(sender, **kwargs):
+    """
+    Меняет версию справочника временных меток.
+    """
+    bump_catalog_version(TAGS_CATALOG)
+
+
+@receiver(post_save, sender=RecipeIngredients)
+def recipe_ingredient_created(sender, instance, created, **kwargs):
+    """
+    Добавляет рецепт в обратный индекс ингредиентов и пересчитывает
+    его MinHash-подпись.
+    """
+    if created:
+        pantry_index.track(
+            instance.recipe_id, [instance.ingredient_id], added=True
+        )
+        schedule_signature_update(instance.recipe_id)
+
+
+@receiver(post_delete, sender=RecipeIngredients)
+def recipe_ingredient_deleted(sender, instance, **kwargs):
+    """
+    Убирает рецепт из обратного индекса ингредиентов и пересчитывает
+    его MinHash-подпись.
+    """
+    pantry_index.track(
+        instance.recipe_id, [instance.ingredient_id], added=False
+    )
+    schedule_signature_update(instance.recipe_id)
+
+
+@receiver(post_save, sender=Shoplist)
+def shoplist_created(sender, instance, created, **kwargs):
+    """
+    Добавляет ингредиенты рецепта в суммы списка покупок.
+    """
+    if created:
+        add_recipe_to_shoplist(instance.user_id, instance.recipe_id)
+        change_counter(Recipes, instance.recipe_id, 'in_carts_count', 1)
+
+
+@receiver(pre_delete, sender=Shoplist)
+def shoplist_deleted(sender, instance, **kwargs):
+    """
+    Вычитает ингредиенты рецепта из сумм списка покупок.
+
+    Используется pre_delete, чтобы при каскадном удалении рецепта его
+    ингредиенты еще были доступны.
+    """
+    remove_recipe_from_shoplist(instance.user_id, instance.recipe_id)
+    change_counter(Recipes, instance.recipe_id, 'in_carts_count', -1)
+
+
+@receiver(post_save, sender=Recipes)
+def recipe_saved(sender, instance, created, **kwargs):
+    """
+    Создает производные изображения рецепта после фиксации транзакции,
+    учитывает новый рецепт в счетчике автора и в лентах подписчиков.
+    """
+    if created:
+        change_counter(User, instance.author_id, 'recipes_count', 1)
+        fan_out_recipe(instance)
+    if instance.image:
+        transaction.on_commit(
+            partial(generate_derivatives_safely, instance.image.name)
+        )
+
+
+@receiver(post_delete, sender=Recipes)
+def recipe_deleted(sender, instance, **kwargs):
+    """
+    Уменьшает счетчик рецептов автора.
+    """
+    change_counter(User, instance.author_id, 'recipes_count', -1)
+
+
+@receiver(post_save, sender=Favorites)
+def favorite_created(sender, instance, created, **kwargs):
+    """
+    Увеличивает счетчик добавлений рецепта в избранное.
+    """
+    if created:
+        change_counter(Recipes, instance.recipe_id, 'favorites_count', 1)
+
+
+@receiver(post_delete, sender=Favorites)
+def favorite_deleted(sender, instance, **kwargs):
+    """
+    Уменьшает счетчик добавлений рецепта в избранное.
+    """
+    change_counter(Recipes, instance.recipe_id, 'favorites_count', -1)
+
+
+@receiver(post_save, sender=Subscribe)
+def subscribe_created(sender, instance, created, **kwargs):
+    """
+    Увеличивает счетчик подписчиков автора и добавляет его рецепты
+    в ленту подписчика.
+    """
+    if created:
+        change_counter(User, instance.author_id, 'followers_count', 1)
+        backfill_subscription(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Subscribe)
+def subscribe_deleted(sender, instance, **kwargs):
+    """
+    Уменьшает счетчик подписчиков автора и убирает его рецепты
+    из ленты подписчика.
+    """
+    change_counter(User, instance.author_id, 'followers_count', -1)
+    prune_subscription(instance.user_id, instance.author_id)
+
+
+@receiver(post_migrate)
+def migrated(sender, using, **kwargs):
+    """
+    Восстанавливает триггеры полнотекстового поиска на SQLite, если
+    миграция пересоздала таблицу рецептов.
+    """
+    if sender.name == 'recipes':
+        restore_sqlite_search(connections[using])
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from django.db.models import Count
+from recipes.paginators import EstimatedCountPaginator
 
 from .models import Subscribe, User
 
@@ -19,39 +19,35 @@ class UserAdmin(admin.ModelAdmin):
         'get_followers_count'
     )
     list_filter = (
-        'username',
-        'email'
+        'is_staff',
+        'is_active'
     )
     search_fields = (
-        'username',
-        'email'
+        '^username',
+        '^email'
     )
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
+    @admin.display(
+        description='Количество рецептов',
+        ordering='recipes_count'
+    )
     def get_recipes_count(self, obj):
         """
         Возвращает количество рецептов, созданных пользователем.
         """
-        return obj.recipes.count()
+        return obj.recipes_count
 
+    @admin.display(
+        description='Количество подписчиков',
+        ordering='followers_count'
+    )
     def get_followers_count(self, obj):
         """
         Возвращает количество подписчиков данного пользователя.
         """
-        return obj.follower.count()
-
-    get_recipes_count.short_description = 'Количество рецептов'
-    get_followers_count.short_description = 'Количество подписчиков'
-
-    def get_queryset(self, request):
-        """
-        Переопределяет базовый queryset для объектов класса User.
-        """
-        queryset = super().get_queryset(request)
-        queryset = queryset.annotate(
-            recipe_count=Count('recipes', distinct=True),
-            follower_count=Count('follower', distinct=True)
-        )
-        return queryset
+        return obj.followers_count
 
 
 @admin.register(Subscribe)
@@ -64,6 +60,9 @@ class SubscribeAdmin(admin.ModelAdmin):
         'author',
         'user'
     )
-    search_fields = ('user',)
-    list_filter = ('user', )
+    list_select_related = ('author', 'user')
+    search_fields = ('^user__username',)
+    autocomplete_fields = ('author', 'user')
     empty_value_display = '-empty-'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
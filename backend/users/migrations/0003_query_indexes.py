@@ -0,0 +1,20 @@
+# Generated by Django 3.2.3 on 2026-10-18 00:48
+
+from django.db import migrations, models
+from foodgram.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('users', '0002_user_counters'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='subscribe',
+            index=models.Index(fields=['user', 'author'], name='subscribe_user_author_idx'),
+        ),
+    ]
@@ -25,6 +25,16 @@ class User(AbstractUser):
         verbose_name='Фамилия пользователя',
         max_length=USERNAME_SURNAME
     )
+    recipes_count = models.PositiveIntegerField(
+        verbose_name='Количество рецептов',
+        default=0,
+        editable=False
+    )
+    followers_count = models.PositiveIntegerField(
+        verbose_name='Количество подписчиков',
+        default=0,
+        editable=False
+    )
 
     class Meta:
         ordering = ('id',)
@@ -68,6 +78,12 @@ class Subscribe(models.Model):
                 name='unique_subscribe'
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=['user', 'author'],
+                name='subscribe_user_author_idx'
+            ),
+        ]
 
     def __str__(self) -> str:
         return f'{self.user} подписался на {self.author} '
@@ -0,0 +1,27 @@
+import tempfile
+from pathlib import Path
+
+from foodgram.settings import *  # noqa: F401, F403
+
+TEST_DIR = Path(tempfile.gettempdir())
+
+# Тесты работают на SQLite. Вторая база нужна тестам маршрутизации
+# чтения: она изображает реплику, поэтому маршрутизатор по умолчанию
+# отключен и включается в этих тестах явно.
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': TEST_DIR / 'foodgram.sqlite3',
+        'TEST': {'NAME': TEST_DIR / 'test_foodgram.sqlite3'},
+    },
+    'replica_1': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': TEST_DIR / 'foodgram_replica.sqlite3',
+        'TEST': {'NAME': TEST_DIR / 'test_foodgram_replica.sqlite3'},
+    },
+}
+DATABASE_ROUTERS = []
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
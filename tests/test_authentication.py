@@ -0,0 +1,70 @@
+from unittest import mock
+
+from api import authentication
+from api.authentication import CachedTokenAuthentication, TokenLRUCache
+from django.core.cache import caches
+from django.test import TestCase
+from foodgram.settings import (AUTH_TOKEN_CACHE_SIZE, AUTH_TOKEN_CACHE_TTL,
+                               AUTH_TOKEN_REVOCATION_CACHE)
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from tests.utils import create_user
+
+
+class TokenRevocationTest(TestCase):
+    """
+    Отзыв токена в одном процессе сразу действует в других процессах,
+    у каждого из которых свой кэш токенов в памяти.
+    """
+
+    def setUp(self):
+        caches[AUTH_TOKEN_REVOCATION_CACHE].clear()
+        self.user = create_user('user')
+        self.key = Token.objects.create(user=self.user).key
+        self.first = TokenLRUCache(AUTH_TOKEN_CACHE_SIZE, AUTH_TOKEN_CACHE_TTL)
+        self.second = TokenLRUCache(
+            AUTH_TOKEN_CACHE_SIZE, AUTH_TOKEN_CACHE_TTL
+        )
+        for process in (self.first, self.second):
+            self.authenticate(process)
+
+    def in_process(self, process):
+        return mock.patch.object(authentication, 'local_tokens', process)
+
+    def authenticate(self, process):
+        with self.in_process(process):
+            user, _ = CachedTokenAuthentication().authenticate_credentials(
+                self.key
+            )
+        return user
+
+    def test_cached_token_skips_database(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.authenticate(self.second), self.user)
+
+    def test_logout(self):
+        with self.in_process(self.first):
+            with self.captureOnCommitCallbacks(execute=True):
+                Token.objects.filter(key=self.key).delete()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(self.second)
+
+    def test_deactivation(self):
+        with self.in_process(self.first):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.user.is_active = False
+                self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(self.second)
+
+    def test_password_change(self):
+        with self.in_process(self.first):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.user.set_password('new-password')
+                self.user.save()
+
+        user = self.authenticate(self.second)
+        self.assertEqual(user.password, self.user.password)
@@ -0,0 +1,86 @@
+from unittest import mock
+
+from django.test import TestCase
+from recipes import catalog
+from recipes.catalog import INGREDIENTS_CATALOG
+from recipes.models import Ingredients
+from rest_framework.test import APIClient
+
+from tests.utils import bump_in_other_process, create_ingredients
+
+
+class CatalogVersionTest(TestCase):
+    """
+    Индекс автодополнения перестраивается по версии справочника,
+    общей для всех процессов.
+    """
+
+    def setUp(self):
+        catalog._versions.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            create_ingredients(3)
+        self.client = APIClient()
+
+    def test_autocomplete_without_queries(self):
+        self.client.get('/api/ingredients/?name=инг')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/ingredients/?name=инг')
+        self.assertEqual(len(response.data), 3)
+
+    def test_local_change_rebuilds_index(self):
+        self.client.get('/api/ingredients/?name=инг')
+        with self.captureOnCommitCallbacks(execute=True):
+            Ingredients.objects.create(name='Инжир', measurement_unit='г')
+        response = self.client.get('/api/ingredients/?name=инж')
+        self.assertEqual([item['name'] for item in response.data], ['Инжир'])
+
+    def test_change_in_other_process_rebuilds_index(self):
+        self.client.get('/api/ingredients/?name=инг')
+        Ingredients.objects.bulk_create([
+            Ingredients(name='Инжир', measurement_unit='г')
+        ])
+        bump_in_other_process(INGREDIENTS_CATALOG)
+
+        response = self.client.get('/api/ingredients/?name=инж')
+        self.assertEqual(response.data, [])
+
+        with mock.patch.object(catalog, 'CATALOG_VERSION_TTL', 0):
+            response = self.client.get('/api/ingredients/?name=инж')
+        self.assertEqual([item['name'] for item in response.data], ['Инжир'])
+
+
+class CatalogETagTest(TestCase):
+    """
+    ETag справочников одинаковы во всех процессах и меняются после
+    изменения справочника в другом процессе.
+    """
+
+    def setUp(self):
+        catalog._versions.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            create_ingredients(3)
+        self.client = APIClient()
+
+    def test_etag_is_shared_between_processes(self):
+        etag = self.client.get('/api/ingredients/')['ETag']
+        # Новый процесс еще не читал версий.
+        catalog._versions.clear()
+        response = self.client.get(
+            '/api/ingredients/', HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_change_in_other_process_changes_etag(self):
+        etag = self.client.get('/api/ingredients/')['ETag']
+        Ingredients.objects.bulk_create([
+            Ingredients(name='Инжир', measurement_unit='г')
+        ])
+        bump_in_other_process(INGREDIENTS_CATALOG)
+
+        with mock.patch.object(catalog, 'CATALOG_VERSION_TTL', 0):
+            response = self.client.get(
+                '/api/ingredients/', HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.data), 4)
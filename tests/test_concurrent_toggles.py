@@ -0,0 +1,104 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+from django.test import TransactionTestCase
+from recipes.models import (FeedEntry, Favorites, Recipes, Shoplist,
+                            ShoplistIngredients)
+from users.models import Subscribe, User
+
+from tests.utils import (create_ingredients, create_recipe, create_user,
+                         token_client)
+
+THREADS = 8
+
+
+class ConcurrentTogglesTest(TransactionTestCase):
+    """
+    Одновременные повторные запросы на добавление и удаление создают
+    и удаляют запись ровно один раз, остальные получают ошибку 400.
+    """
+
+    def setUp(self):
+        self.author = create_user('author')
+        self.user = create_user('user')
+        self.recipe = create_recipe(
+            self.author, 'Суп', ingredients=create_ingredients(3), amount=7
+        )
+
+    def run_concurrently(self, method, url):
+        """
+        Отправляет THREADS одинаковых запросов одновременно и возвращает
+        отсортированные коды ответов.
+        """
+        barrier = threading.Barrier(THREADS)
+        clients = [token_client(self.user) for _ in range(THREADS)]
+
+        def send(client):
+            try:
+                barrier.wait()
+                return getattr(client, method)(url).status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=THREADS) as pool:
+            return sorted(pool.map(send, clients))
+
+    def assert_toggled_once(self, url, model, counter=None):
+        self.assertEqual(
+            self.run_concurrently('post', url), [201] + [400] * (THREADS - 1)
+        )
+        self.assertEqual(model.objects.count(), 1)
+        if counter:
+            self.assertEqual(counter(), 1)
+
+        self.assertEqual(
+            self.run_concurrently('delete', url),
+            [204] + [400] * (THREADS - 1)
+        )
+        self.assertEqual(model.objects.count(), 0)
+        if counter:
+            self.assertEqual(counter(), 0)
+
+    def test_favorite(self):
+        self.assert_toggled_once(
+            f'/api/recipes/{self.recipe.id}/favorite/',
+            Favorites,
+            lambda: Recipes.objects.get(pk=self.recipe.pk).favorites_count
+        )
+
+    def test_shopping_cart(self):
+        url = f'/api/recipes/{self.recipe.id}/shopping_cart/'
+        self.assertEqual(
+            self.run_concurrently('post', url), [201] + [400] * (THREADS - 1)
+        )
+        self.assertEqual(Shoplist.objects.count(), 1)
+        self.assertEqual(
+            Recipes.objects.get(pk=self.recipe.pk).in_carts_count, 1
+        )
+        self.assertEqual(
+            sorted(ShoplistIngredients.objects.values_list(
+                'amount', flat=True
+            )),
+            [7, 7, 7]
+        )
+
+        self.assertEqual(
+            self.run_concurrently('delete', url),
+            [204] + [400] * (THREADS - 1)
+        )
+        self.assertEqual(Shoplist.objects.count(), 0)
+        self.assertEqual(
+            Recipes.objects.get(pk=self.recipe.pk).in_carts_count, 0
+        )
+        self.assertFalse(
+            ShoplistIngredients.objects.filter(amount__gt=0).exists()
+        )
+
+    def test_subscribe(self):
+        self.assert_toggled_once(
+            f'/api/users/{self.author.id}/subscribe/',
+            Subscribe,
+            lambda: User.objects.get(pk=self.author.pk).followers_count
+        )
+        self.assertEqual(FeedEntry.objects.count(), 0)
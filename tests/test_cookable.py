@@ -0,0 +1,102 @@
+from unittest import mock
+
+from django.test import TestCase
+from recipes import catalog, pantry_index
+from recipes.catalog import RECIPE_INGREDIENTS_CATALOG
+from recipes.models import PantryChange, RecipeIngredients, Recipes
+from recipes.pantry_index import PantryIndex
+from rest_framework.test import APIClient
+
+from tests.utils import (bump_in_other_process, create_ingredients,
+                         create_recipe, create_user)
+
+
+class CookableTest(TestCase):
+    """
+    Поиск по имеющимся ингредиентам видит рецепты, добавленные
+    как в этом, так и в другом процессе.
+    """
+
+    def setUp(self):
+        catalog._versions.clear()
+        self.author = create_user('author')
+        self.ingredients = create_ingredients(4)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.soup = create_recipe(
+                self.author, 'Суп', ingredients=self.ingredients[:2]
+            )
+        self.client = APIClient()
+
+    def cookable(self, ingredients, coverage=100):
+        query = '&'.join(
+            f'ingredients={ingredient.id}' for ingredient in ingredients
+        )
+        response = self.client.get(
+            f'/api/recipes/cookable/?{query}&coverage={coverage}'
+        )
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.data]
+
+    def test_coverage(self):
+        self.assertEqual(self.cookable(self.ingredients[:2]), [self.soup.id])
+        self.assertEqual(self.cookable(self.ingredients[:1]), [])
+        self.assertEqual(
+            self.cookable(self.ingredients[:1], coverage=50), [self.soup.id]
+        )
+
+    def test_recipe_added_in_this_process(self):
+        self.cookable(self.ingredients)
+        with self.captureOnCommitCallbacks(execute=True):
+            salad = create_recipe(
+                self.author, 'Салат', ingredients=self.ingredients[2:]
+            )
+        self.assertEqual(self.cookable(self.ingredients[2:]), [salad.id])
+
+    def test_recipe_imported_in_other_process(self):
+        self.cookable(self.ingredients)
+        # import_recipes и seed_scale вставляют строки пачками,
+        # без сигналов, и меняют только общую версию связей.
+        salad = Recipes.objects.create(
+            author=self.author, name='Салат', text='Описание',
+            cooking_time=5, image='image_recipes/salad.png'
+        )
+        RecipeIngredients.objects.bulk_create([
+            RecipeIngredients(recipe=salad, ingredient=ingredient, amount=1)
+            for ingredient in self.ingredients[2:]
+        ])
+        bump_in_other_process(RECIPE_INGREDIENTS_CATALOG)
+
+        with mock.patch.object(catalog, 'CATALOG_VERSION_TTL', 0):
+            self.assertEqual(self.cookable(self.ingredients[2:]), [salad.id])
+
+    def create_in_other_process(self, name, ingredients):
+        """
+        Создает рецепт так, как это делает другой процесс: изменение
+        попадает в журнал и общую версию, но не в индекс этого процесса.
+        """
+        with mock.patch.object(PantryIndex, '_apply'):
+            with self.captureOnCommitCallbacks(execute=True):
+                return create_recipe(
+                    self.author, name, ingredients=ingredients
+                )
+
+    def test_recipe_added_in_other_process(self):
+        self.cookable(self.ingredients)
+        salad = self.create_in_other_process('Салат', self.ingredients[2:])
+        self.assertTrue(PantryChange.objects.filter(
+            recipe_id=salad.id, added=True
+        ).exists())
+
+        with mock.patch.object(
+            PantryIndex, '_build', side_effect=AssertionError
+        ):
+            self.assertEqual(self.cookable(self.ingredients[2:]), [salad.id])
+
+    def test_gap_larger_than_log_rebuilds(self):
+        self.cookable(self.ingredients)
+        with mock.patch.object(pantry_index, 'PANTRY_LOG_SIZE', 0):
+            salad = self.create_in_other_process(
+                'Салат', self.ingredients[2:]
+            )
+            self.assertEqual(self.cookable(self.ingredients[2:]), [salad.id])
+        self.assertFalse(PantryChange.objects.exists())
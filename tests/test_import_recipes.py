@@ -0,0 +1,87 @@
+import json
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from recipes import feed
+from recipes.minhash import BANDS
+from recipes.models import FeedEntry, RecipeBand, Recipes, RecipeSignature
+from users.models import Subscribe
+
+from tests.utils import create_user
+
+
+def recipe_line(author, name, ingredients=('Соль', 'Перец')):
+    return json.dumps({
+        'author': author,
+        'name': name,
+        'text': 'Описание',
+        'cooking_time': 10,
+        'image': None,
+        'tags': [],
+        'ingredients': [
+            {'name': ingredient, 'measurement_unit': 'г', 'amount': 5}
+            for ingredient in ingredients
+        ],
+    }, ensure_ascii=False)
+
+
+class ImportRecipesTest(TestCase):
+    """
+    Импортированные рецепты получают те же производные данные,
+    что и созданные через API.
+    """
+
+    def setUp(self):
+        self.author = create_user('author')
+        self.popular = create_user('popular')
+        self.followers = [create_user(f'follower{n}') for n in range(3)]
+        for follower in self.followers:
+            Subscribe.objects.create(user=follower, author=self.popular)
+        for follower in self.followers[:2]:
+            Subscribe.objects.create(user=follower, author=self.author)
+
+    def import_recipes(self, *lines, batch_size=1000):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'recipes.ndjson'
+            path.write_text('\n'.join(lines), encoding='utf-8')
+            call_command(
+                'import_recipes', str(path), batch_size=batch_size
+            )
+
+    def test_fan_out(self):
+        with mock.patch.object(feed, 'FEED_FANOUT_LIMIT', 3):
+            self.import_recipes(
+                recipe_line('author', 'Суп'),
+                recipe_line('author', 'Каша'),
+                recipe_line('popular', 'Борщ'),
+                batch_size=2,
+            )
+
+        recipes = Recipes.objects.filter(author=self.author)
+        self.assertEqual(
+            set(FeedEntry.objects.values_list('user_id', 'recipe_id')),
+            {(follower.id, recipe.id)
+             for follower in self.followers[:2] for recipe in recipes}
+        )
+
+    def test_signatures(self):
+        self.import_recipes(
+            recipe_line('author', 'Суп'),
+            recipe_line('author', 'Каша', ('Соль', 'Перец', 'Крупа')),
+            recipe_line('popular', 'Борщ', ('Свекла',)),
+            batch_size=2,
+        )
+
+        self.assertEqual(RecipeSignature.objects.count(), 3)
+        self.assertEqual(RecipeBand.objects.count(), 3 * BANDS)
+        soup, porridge = (
+            Recipes.objects.get(name=name) for name in ('Суп', 'Каша')
+        )
+        response = self.client.get(f'/api/recipes/{soup.id}/similar/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            porridge.id, [recipe['id'] for recipe in response.data]
+        )
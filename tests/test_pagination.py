@@ -0,0 +1,49 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+from users.models import Subscribe
+
+from tests.utils import create_recipe, create_user
+
+
+class CursorPaginationTest(TestCase):
+    """
+    Пагинация по курсору идет по ключу -id и отклоняет параметры,
+    задающие другой порядок выдачи.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+        cls.recipes = [
+            create_recipe(cls.author, f'Суп {letter}') for letter in 'абвгд'
+        ]
+        cls.reader = create_user('reader')
+        Subscribe.objects.create(user=cls.reader, author=cls.author)
+
+    def test_pages_follow_id(self):
+        client = APIClient()
+        response = client.get('/api/recipes/?pagination=cursor&limit=3')
+        self.assertEqual(response.status_code, 200)
+        ids = [recipe['id'] for recipe in response.data['results']]
+        response = client.get(response.data['next'])
+        ids += [recipe['id'] for recipe in response.data['results']]
+        self.assertEqual(
+            ids, sorted((recipe.id for recipe in self.recipes), reverse=True)
+        )
+        self.assertIsNone(response.data['next'])
+
+    def test_ordering_params_are_rejected(self):
+        client = APIClient()
+        client.force_authenticate(self.reader)
+        for url in ('/api/recipes/?pagination=cursor&',
+                    '/api/recipes/feed/?'):
+            for param in ('ordering=popular', 'search=суп'):
+                with self.subTest(url=url, param=param):
+                    response = client.get(url + param)
+                    self.assertEqual(response.status_code, 400)
+                    self.assertIn(param.split('=')[0], response.data)
+
+    def test_page_number_mode_keeps_ordering(self):
+        response = APIClient().get('/api/recipes/?limit=3&search=суп')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 5)
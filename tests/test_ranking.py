@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta, timezone
+
+from django.test import TestCase
+from foodgram.settings import RANKING_HALF_LIFE_HOURS
+from recipes.models import Favorites, RecipeRanking, Shoplist
+from recipes.ranking import current_score, refresh_ranking
+from rest_framework.test import APIClient
+
+from tests.utils import create_recipe, create_user
+
+# Через несколько лет после эпохи рейтинга множитель затухания
+# не помещается в float.
+FAR_FUTURE = datetime(2040, 1, 1, tzinfo=timezone.utc)
+
+
+class RankingTest(TestCase):
+    """
+    Рейтинг популярности пересчитывается инкрементально и не
+    переполняется со временем.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+        cls.readers = [create_user(f'reader{number}') for number in range(3)]
+        cls.recipes = [
+            create_recipe(cls.author, f'Рецепт {letter}') for letter in 'абв'
+        ]
+
+    def test_refresh_far_from_epoch(self):
+        for reader in self.readers:
+            Favorites.objects.create(user=reader, recipe=self.recipes[0])
+        Shoplist.objects.create(user=self.readers[0], recipe=self.recipes[1])
+
+        self.assertEqual(refresh_ranking(FAR_FUTURE), 2)
+        scores = {
+            ranking.recipe_id: current_score(ranking.score, FAR_FUTURE)
+            for ranking in RecipeRanking.objects.all()
+        }
+        self.assertAlmostEqual(scores[self.recipes[0].id], 3.0)
+        self.assertAlmostEqual(scores[self.recipes[1].id], 0.5)
+
+    def test_incremental_refresh_decays_old_activity(self):
+        Favorites.objects.create(user=self.readers[0], recipe=self.recipes[0])
+        refresh_ranking(FAR_FUTURE)
+        later = FAR_FUTURE + timedelta(hours=RANKING_HALF_LIFE_HOURS)
+        Favorites.objects.create(user=self.readers[1], recipe=self.recipes[0])
+        self.assertEqual(refresh_ranking(later), 1)
+
+        ranking = RecipeRanking.objects.get(recipe=self.recipes[0])
+        # Первое добавление за период полураспада потеряло половину веса.
+        self.assertAlmostEqual(current_score(ranking.score, later), 1.5)
+
+    def test_popular_ordering(self):
+        Favorites.objects.create(user=self.readers[0], recipe=self.recipes[0])
+        for reader in self.readers:
+            Favorites.objects.create(user=reader, recipe=self.recipes[1])
+        refresh_ranking(FAR_FUTURE)
+
+        response = APIClient().get('/api/recipes/?limit=3&ordering=popular')
+        self.assertEqual(
+            [recipe['id'] for recipe in response.data['results']],
+            [self.recipes[1].id, self.recipes[0].id, self.recipes[2].id]
+        )
@@ -0,0 +1,126 @@
+import base64
+from io import BytesIO
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from recipes.models import RecipeIngredients
+from rest_framework.test import APIClient
+
+from tests.utils import (PNG_BASE64, create_ingredients, create_recipe,
+                         create_tags, create_user)
+
+# Рецепт, автор для проверки прав, UPDATE, рецепт для ответа
+# с временными метками и ингредиентами.
+TITLE_ONLY_QUERIES = 6
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE')
+
+
+def writes(queries):
+    """
+    Возвращает запросы на изменение данных.
+    """
+    return [
+        query['sql'] for query in queries.captured_queries
+        if query['sql'].startswith(WRITE_STATEMENTS)
+    ]
+
+
+class RecipeUpdateTest(TestCase):
+    """
+    Изменение рецепта записывает только изменившиеся данные.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+        cls.tags = create_tags(2)
+        cls.ingredients = create_ingredients(3)
+        cls.recipe = create_recipe(
+            cls.author, 'Суп', tags=cls.tags, ingredients=cls.ingredients
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+        self.url = f'/api/recipes/{self.recipe.id}/'
+
+    def full_payload(self, **fields):
+        payload = {
+            'name': self.recipe.name,
+            'text': self.recipe.text,
+            'cooking_time': self.recipe.cooking_time,
+            'image': PNG_BASE64,
+            'tags': [tag.id for tag in self.tags],
+            'ingredients': [
+                {'id': ingredient.id, 'amount': 10}
+                for ingredient in self.ingredients
+            ],
+        }
+        payload.update(fields)
+        return payload
+
+    def test_title_only(self):
+        rows = list(RecipeIngredients.objects.values_list('id', 'amount'))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(
+                self.url, {'name': 'Борщ'}, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['name'], 'Борщ')
+        self.assertEqual(len(response.data['ingredients']), 3)
+        self.assertEqual(
+            len([query for query in queries.captured_queries
+                 if 'SAVEPOINT' not in query['sql']]),
+            TITLE_ONLY_QUERIES
+        )
+        self.assertEqual(len(writes(queries)), 1)
+        self.assertEqual(
+            list(RecipeIngredients.objects.values_list('id', 'amount')), rows
+        )
+
+    def test_unchanged_recipe_makes_no_writes(self):
+        image = self.recipe.image.name
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(
+                self.url, self.full_payload(), format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(writes(queries), [])
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image.name, image)
+
+    def test_changed_amount_updates_one_row(self):
+        ingredients = [
+            {'id': ingredient.id, 'amount': 10}
+            for ingredient in self.ingredients
+        ]
+        ingredients[0]['amount'] = 25
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(
+                self.url, {'ingredients': ingredients}, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        statements = writes(queries)
+        self.assertEqual(len(statements), 1)
+        self.assertIn('recipes_recipeingredients', statements[0])
+
+    def test_new_image_is_saved(self):
+        buffer = BytesIO()
+        Image.new('RGB', (2, 2), 'red').save(buffer, 'PNG')
+        image = 'data:image/png;base64,' + base64.b64encode(
+            buffer.getvalue()
+        ).decode()
+        old_name = self.recipe.image.name
+        response = self.client.patch(
+            self.url, {'image': image}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.recipe.refresh_from_db()
+        self.assertNotEqual(self.recipe.image.name, old_name)
+
+    def test_partial_update_validates_passed_fields(self):
+        response = self.client.patch(self.url, {'tags': []}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('tags', response.data)
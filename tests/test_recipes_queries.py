@@ -0,0 +1,78 @@
+from django.test import TestCase
+from recipes.models import Favorites, Shoplist
+from rest_framework.test import APIClient
+
+from tests.utils import (create_ingredients, create_recipe, create_tags,
+                         create_user)
+
+# COUNT, рецепты с авторами и признаками, временные метки, ингредиенты.
+LIST_QUERIES = 4
+# Рецепт с автором и признаками, временные метки, ингредиенты.
+DETAIL_QUERIES = 3
+
+
+class RecipesQueriesTest(TestCase):
+    """
+    Список и карточка рецепта стоят фиксированного числа запросов
+    независимо от размера страницы.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        authors = [create_user(f'author{number}') for number in range(3)]
+        tags = create_tags(3)
+        ingredients = create_ingredients(6)
+        cls.recipes = [
+            create_recipe(
+                authors[number % 3],
+                f'Рецепт {chr(ord("а") + number)}',
+                tags=tags[:number % 3 + 1],
+                ingredients=ingredients[number % 3:number % 3 + 3]
+            )
+            for number in range(12)
+        ]
+        cls.reader = create_user('reader')
+        Favorites.objects.create(user=cls.reader, recipe=cls.recipes[-1])
+        Shoplist.objects.create(user=cls.reader, recipe=cls.recipes[-1])
+
+    def get_client(self, authenticated):
+        client = APIClient()
+        if authenticated:
+            client.force_authenticate(self.reader)
+        return client
+
+    def test_list_queries(self):
+        for authenticated in (False, True):
+            client = self.get_client(authenticated)
+            for limit in (2, 10):
+                with self.subTest(authenticated=authenticated, limit=limit):
+                    with self.assertNumQueries(LIST_QUERIES):
+                        response = client.get(f'/api/recipes/?limit={limit}')
+                    self.assertEqual(response.status_code, 200)
+                    results = response.data['results']
+                    self.assertEqual(len(results), limit)
+                    self.assertEqual(
+                        len(results[0]['ingredients']), 3
+                    )
+                    self.assertEqual(
+                        results[0]['is_favorited'], authenticated
+                    )
+                    self.assertEqual(
+                        results[0]['is_in_shopping_cart'], authenticated
+                    )
+
+    def test_detail_queries(self):
+        recipe = self.recipes[-1]
+        for authenticated in (False, True):
+            client = self.get_client(authenticated)
+            with self.subTest(authenticated=authenticated):
+                with self.assertNumQueries(DETAIL_QUERIES):
+                    response = client.get(f'/api/recipes/{recipe.id}/')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data['id'], recipe.id)
+                self.assertEqual(
+                    len(response.data['tags']), recipe.tags.count()
+                )
+                self.assertEqual(
+                    response.data['is_favorited'], authenticated
+                )
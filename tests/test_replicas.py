@@ -0,0 +1,90 @@
+from unittest import mock
+
+from api.authentication import local_tokens
+from django.test import TransactionTestCase, override_settings
+from foodgram import middleware
+from foodgram.middleware import REPLICA_PIN_COOKIE
+from recipes.models import Favorites, Recipes
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from tests.utils import create_recipe, create_user, token_client
+
+REPLICA = 'replica_1'
+
+
+class ReplicaRoutingTest(TransactionTestCase):
+    """
+    Маршрутизация чтения между двумя файлами SQLite: основной базой
+    и базой, изображающей отстающую реплику.
+
+    Рецепт есть только в основной базе, поэтому по ответу на запрос
+    рецепта видно, из какой базы он прочитан. Маршрутизатор включается
+    только на время теста: иначе очистка баз после теста не увидит
+    таблиц реплики.
+    """
+    databases = {'default', REPLICA}
+
+    def setUp(self):
+        local_tokens.clear()
+        self.author = create_user('author')
+        self.user = create_user('user')
+        self.other = create_user('other')
+        self.recipe = create_recipe(self.author, 'Суп')
+        self.url = f'/api/recipes/{self.recipe.id}/'
+        self.client = token_client(self.user)
+        self.other_client = token_client(self.other)
+        for user in (self.author, self.user, self.other):
+            user.save(using=REPLICA, force_insert=True)
+        for token in Token.objects.all():
+            token.save(using=REPLICA, force_insert=True)
+        routers = override_settings(
+            DATABASE_ROUTERS=['foodgram.routers.ReplicaRouter']
+        )
+        routers.enable()
+        self.addCleanup(routers.disable)
+
+    def test_anonymous_reads_from_replica(self):
+        self.assertEqual(APIClient().get(self.url).status_code, 404)
+
+    def test_write_goes_to_primary(self):
+        response = self.client.post(f'{self.url}favorite/')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Favorites.objects.filter(user=self.user).exists())
+        self.assertFalse(Favorites.objects.using(REPLICA).exists())
+        self.assertFalse(Recipes.objects.using(REPLICA).exists())
+
+    def test_writer_reads_from_primary(self):
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+        self.client.post(f'{self.url}favorite/')
+
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_other_client_from_same_address_reads_from_replica(self):
+        self.client.post(f'{self.url}favorite/', REMOTE_ADDR='10.0.0.1')
+
+        response = self.other_client.get(self.url, REMOTE_ADDR='10.0.0.1')
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(APIClient().get(self.url).status_code, 404)
+
+    def test_expired_pin_reads_from_replica(self):
+        self.client.post(f'{self.url}favorite/')
+
+        with mock.patch.object(middleware, 'REPLICA_PIN_SECONDS', -1):
+            self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_forged_pin_reads_from_replica(self):
+        self.other_client.cookies[REPLICA_PIN_COOKIE] = '1'
+
+        self.assertEqual(self.other_client.get(self.url).status_code, 404)
+
+    def test_new_token_is_checked_on_primary(self):
+        Token.objects.using(REPLICA).filter(user=self.user).delete()
+
+        response = self.client.get('/api/users/me/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['id'], self.user.id)
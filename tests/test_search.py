@@ -0,0 +1,47 @@
+from django.db import connection
+from django.test import TestCase
+from recipes.search import SQLITE_TRIGGERS, restore_sqlite_search
+from rest_framework.test import APIClient
+
+from tests.utils import create_recipe, create_user
+
+
+def search_ids(query):
+    response = APIClient().get(f'/api/recipes/?limit=10&search={query}')
+    return [recipe['id'] for recipe in response.data['results']]
+
+
+class RecipeSearchTest(TestCase):
+    """
+    Поиск находит рецепты, созданные после всех миграций, и переживает
+    пересоздание таблицы рецептов на SQLite.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+        cls.soup = create_recipe(cls.author, 'Щавелевый суп')
+        cls.salad = create_recipe(cls.author, 'Салат')
+
+    def test_new_recipes_are_found(self):
+        self.assertEqual(search_ids('суп'), [self.soup.id])
+
+    def test_renamed_recipe_is_found(self):
+        self.salad.name = 'Ёжики'
+        self.salad.save()
+        self.assertEqual(search_ids('ежики'), [self.salad.id])
+
+    def test_restore_after_table_rebuild(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Триггеры FTS5 есть только на SQLite')
+        with connection.cursor() as cursor:
+            for name in SQLITE_TRIGGERS:
+                cursor.execute(f'DROP TRIGGER {name}')
+        recipe = create_recipe(self.author, 'Суп без триггеров')
+        self.assertNotIn(recipe.id, search_ids('суп'))
+
+        self.assertTrue(restore_sqlite_search(connection))
+        self.assertEqual(
+            sorted(search_ids('суп')), [self.soup.id, recipe.id]
+        )
+        self.assertFalse(restore_sqlite_search(connection))
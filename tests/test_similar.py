@@ -0,0 +1,65 @@
+from unittest import mock
+
+from django.db import transaction
+from django.test import TestCase
+from recipes import minhash
+from recipes.minhash import schedule_signature_update
+from recipes.models import RecipeSignature
+from rest_framework.test import APIClient
+
+from tests.utils import create_ingredients, create_recipe, create_user
+
+
+class SignatureUpdateTest(TestCase):
+    """
+    Подпись рецепта пересчитывается один раз на транзакцию.
+    """
+
+    def setUp(self):
+        self.author = create_user('author')
+        self.ingredients = create_ingredients(5)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe = create_recipe(
+                self.author, 'Суп', ingredients=self.ingredients[:3]
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def test_changed_ingredients_recompute_once(self):
+        payload = {'ingredients': [
+            {'id': ingredient.id, 'amount': 10}
+            for ingredient in self.ingredients[2:]
+        ]}
+        with mock.patch.object(
+            minhash, 'update_signatures', wraps=minhash.update_signatures
+        ) as update:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.patch(
+                    f'/api/recipes/{self.recipe.id}/', payload, format='json'
+                )
+
+        self.assertEqual(response.status_code, 200)
+        update.assert_called_once_with({self.recipe.id})
+        self.assertEqual(
+            minhash.load_signature(
+                RecipeSignature.objects.get(recipe=self.recipe).signature
+            ),
+            minhash.compute_signature(
+                [ingredient.id for ingredient in self.ingredients[2:]]
+            )
+        )
+
+    def test_rolled_back_updates_are_dropped(self):
+        other = create_recipe(self.author, 'Каша')
+        with mock.patch.object(minhash, 'update_signatures') as update:
+            with self.captureOnCommitCallbacks(execute=True):
+                try:
+                    with transaction.atomic():
+                        schedule_signature_update(self.recipe.id)
+                        raise ValueError
+                except ValueError:
+                    pass
+                schedule_signature_update(other.id)
+                schedule_signature_update(other.id)
+
+        update.assert_called_once_with({other.id})
@@ -0,0 +1,59 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+from users.models import Subscribe
+
+from tests.utils import create_recipe, create_user
+
+# Подписки, рецепты авторов (COUNT добавляется при пагинации).
+SUBSCRIPTIONS_QUERIES = 2
+
+
+class SubscriptionsTest(TestCase):
+    """
+    Страница подписок стоит фиксированного числа запросов и отдается
+    как с пагинацией, так и без нее.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = create_user('reader')
+        for number in range(4):
+            author = create_user(f'author{number}')
+            for letter in 'абв':
+                create_recipe(author, f'Рецепт {letter}')
+            Subscribe.objects.create(user=cls.reader, author=author)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def test_without_pagination(self):
+        with self.assertNumQueries(SUBSCRIPTIONS_QUERIES):
+            response = self.client.get(
+                '/api/users/subscriptions/?recipes_limit=2'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 4)
+        for author in response.data:
+            self.assertEqual(len(author['recipes']), 2)
+            self.assertEqual(author['recipes_count'], 3)
+            self.assertTrue(author['is_subscribed'])
+
+    def test_with_pagination(self):
+        for limit in (1, 3):
+            with self.subTest(limit=limit):
+                with self.assertNumQueries(SUBSCRIPTIONS_QUERIES + 1):
+                    response = self.client.get(
+                        f'/api/users/subscriptions/?limit={limit}'
+                    )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data['count'], 4)
+                results = response.data['results']
+                self.assertEqual(len(results), limit)
+                self.assertEqual(len(results[0]['recipes']), 3)
+
+    def test_invalid_recipes_limit(self):
+        response = self.client.get(
+            '/api/users/subscriptions/?recipes_limit=many'
+        )
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,95 @@
+import base64
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db.models import F
+from recipes.models import (CatalogVersion, Ingredients, RecipeIngredients,
+                            Recipes, TimeTag)
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from users.models import User
+
+PNG = base64.b64decode(
+    'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAC'
+    'hwGA60e6kgAAAABJRU5ErkJggg=='
+)
+PNG_BASE64 = 'data:image/png;base64,' + base64.b64encode(PNG).decode()
+
+
+def create_user(username, **fields):
+    """
+    Создает пользователя с паролем по умолчанию.
+    """
+    return User.objects.create_user(
+        username=username,
+        email=f'{username}@foodgram.ru',
+        password='password',
+        first_name='Имя',
+        last_name='Фамилия',
+        **fields
+    )
+
+
+def create_tags(count):
+    """
+    Создает count временных меток.
+    """
+    return [
+        TimeTag.objects.create(
+            name=f'Метка {number}',
+            color=f'#0000{number:02d}',
+            slug=f'tag{number}'
+        )
+        for number in range(count)
+    ]
+
+
+def create_ingredients(count):
+    """
+    Создает count ингредиентов.
+    """
+    return [
+        Ingredients.objects.create(
+            name=f'Ингредиент {number}', measurement_unit='г'
+        )
+        for number in range(count)
+    ]
+
+
+def create_recipe(author, name, tags=(), ingredients=(), amount=10):
+    """
+    Создает рецепт с временными метками и ингредиентами.
+    """
+    recipe = Recipes.objects.create(
+        author=author,
+        name=name,
+        text='Описание рецепта',
+        cooking_time=10,
+        image=SimpleUploadedFile('recipe.png', PNG, content_type='image/png')
+    )
+    recipe.tags.set(tags)
+    for ingredient in ingredients:
+        RecipeIngredients.objects.create(
+            recipe=recipe, ingredient=ingredient, amount=amount
+        )
+    return recipe
+
+
+def token_client(user):
+    """
+    Возвращает клиент API, авторизованный токеном пользователя.
+    """
+    client = APIClient()
+    token, _ = Token.objects.get_or_create(user=user)
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    return client
+
+
+def bump_in_other_process(name):
+    """
+    Меняет версию справочника так, как это делает другой процесс:
+    только в базе, не затрагивая версии, прочитанные этим процессом.
+    """
+    CatalogVersion.objects.get_or_create(name=name)
+    CatalogVersion.objects.filter(name=name).update(
+        version=F('version') + 1
+    )